@@ -0,0 +1,278 @@
+"""
+Latency, throughput and query counts of the core API flows.
+
+Seeds a benchmark database with `--users`, `--books` and `--borrowings`,
+then calls every case `--runs` times in process, one request at a time,
+through the full middleware and DRF stack:
+
+    book list / detail       with the response cache disabled and enabled
+    borrowing list           as a user and as staff, `is_active`, `user_id`
+    borrow / return          `POST /api/borrowings/` and `.../return/`
+
+Runs on PostgreSQL or on SQLite (`SQLITE_PATH=bench.sqlite3`). With
+`--output` the results are written as JSON together with the commit,
+the database vendor and the volumes, ready for `benchmarks.compare`.
+
+    python -m benchmarks.api --borrowings 100000 --output before.json
+"""
+import argparse
+import platform
+import random
+import subprocess
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from benchmarks.base import (
+    benchmark_database,
+    measure,
+    report,
+    setup_django,
+)
+
+
+def in_batches(objects, batch_size: int):
+    objects = iter(objects)
+
+    while batch := list(islice(objects, batch_size)):
+        yield batch
+
+
+def seed(users: int, books: int, borrowings: int, batch_size: int = 5000):
+    from books.models import Book
+    from borrowings.models import Borrowing
+    from users.models import User
+
+    for batch in in_batches(
+        (
+            User(email=f"bench{number}@example.com", password="!")
+            for number in range(users)
+        ),
+        batch_size,
+    ):
+        User.objects.bulk_create(batch)
+
+    for batch in in_batches(
+        (
+            Book(
+                title=f"Book {number}",
+                author=f"Author {number % 1000}",
+                cover=Book.Cover.HARD if number % 2 else Book.Cover.SOFT,
+                inventory=10,
+                daily_fee=Decimal("1.50"),
+            )
+            for number in range(books)
+        ),
+        batch_size,
+    ):
+        Book.objects.bulk_create(batch)
+
+    user_ids = list(User.objects.values_list("id", flat=True))
+    book_ids = list(Book.objects.values_list("id", flat=True))
+    today = date.today()
+
+    # Every 10th borrowing is still active, the rest were returned.
+    for batch in in_batches(
+        (
+            Borrowing(
+                expected_return_date=today + timedelta(days=14),
+                actual_return_date=None if number % 10 == 0 else today,
+                book_id=book_ids[number % len(book_ids)],
+                user_id=user_ids[number % len(user_ids)],
+            )
+            for number in range(borrowings)
+        ),
+        batch_size,
+    ):
+        Borrowing.objects.bulk_create(batch)
+
+    Book.objects.reconcile_counters()
+
+
+def count_queries(func) -> int:
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as context:
+        func()
+
+    return len(context.captured_queries)
+
+
+def get_cases() -> dict:
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from books.models import Book
+    from users.models import User
+
+    book_ids = list(Book.objects.values_list("id", flat=True))
+    user_ids = list(User.objects.values_list("id", flat=True))
+    staff = User.objects.create_user(
+        "bench-staff@example.com", "!", is_staff=True
+    )
+    borrower = User.objects.create_user("bench-borrower@example.com", "!")
+    borrowed = []
+
+    def client_for(user):
+        client = APIClient()
+        client.force_authenticate(user)
+
+        return client
+
+    def get(url, user=None, **params):
+        client = client_for(user)
+
+        def request():
+            if user is None:
+                client.force_authenticate(
+                    User(id=random.choice(user_ids))
+                )
+            response = client.get(
+                url() if callable(url) else url,
+                {
+                    key: value() if callable(value) else value
+                    for key, value in params.items()
+                },
+            )
+            assert response.status_code == 200, response.status_code
+
+        return request
+
+    def borrow():
+        client = client_for(borrower)
+        url = reverse("borrowing:borrowing-list")
+        expected_return_date = date.today() + timedelta(days=7)
+
+        def request():
+            response = client.post(
+                url,
+                {
+                    "book": random.choice(book_ids),
+                    "expected_return_date": expected_return_date,
+                },
+            )
+            assert response.status_code == 201, response.status_code
+            borrowed.append(response.data["id"])
+
+        return request
+
+    def return_borrowing():
+        client = client_for(borrower)
+
+        def request():
+            response = client.post(
+                reverse(
+                    "borrowing:borrowing-return-borrowing",
+                    args=[borrowed.pop()],
+                )
+            )
+            assert response.status_code == 200, response.status_code
+
+        return request
+
+    book_list = reverse("book:book-list")
+    borrowing_list = reverse("borrowing:borrowing-list")
+
+    def book_detail():
+        return reverse("book:book-detail", args=[random.choice(book_ids)])
+
+    return {
+        "book list": get(book_list, staff),
+        "book list cached": get(book_list, staff),
+        "book list filtered": get(
+            book_list, staff, cover="HR", ordering="-daily_fee"
+        ),
+        "book detail": get(book_detail, staff),
+        "borrowing list user": get(borrowing_list),
+        "borrowing list user is_active": get(borrowing_list, is_active="1"),
+        "borrowing list staff": get(borrowing_list, staff),
+        "borrowing list staff is_active": get(
+            borrowing_list, staff, is_active="1"
+        ),
+        "borrowing list staff user_id": get(
+            borrowing_list, staff, user_id=lambda: random.choice(user_ids)
+        ),
+        "borrow": borrow(),
+        "return": return_borrowing(),
+    }
+
+
+def run_cases(runs: int) -> list[dict]:
+    from django.test import override_settings
+
+    results = []
+
+    for name, request in get_cases().items():
+        # Only the "cached" case is served from the book response cache.
+        with override_settings(
+            BOOK_CACHE_TIMEOUT=60 if name.endswith("cached") else 0
+        ):
+            result = measure(name, request, runs)
+            result["queries"] = count_queries(request)
+
+        result["requests_per_sec"] = round(1000 / result["mean_ms"], 1)
+        results.append(result)
+
+    return results
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--borrowings", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    setup_django()
+    random.seed(args.seed)
+
+    import django
+
+    with benchmark_database() as connection:
+        seed(args.users, args.books, args.borrowings)
+        results = run_cases(args.runs)
+        metadata = {
+            "commit": get_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "vendor": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "users": args.users,
+            "books": args.books,
+            "borrowings": args.borrowings,
+            "runs": args.runs,
+        }
+
+    report(
+        results,
+        args.output,
+        columns=(
+            "name",
+            "requests_per_sec",
+            "p50_ms",
+            "p95_ms",
+            "p99_ms",
+            "queries",
+        ),
+        metadata=metadata,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway copy of the configured database
+(created the same way `manage.py test` creates its test database), so
+they never touch development or production data.
+"""
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    os.environ.setdefault(
+        "DJANGO_SETTINGS_MODULE", "library_service_api.settings"
+    )
+
+    import django
+    from django.test.utils import setup_test_environment
+
+    django.setup()
+    setup_test_environment()
+
+    # Benchmarks repeat requests as one client far above the throttle
+    # rates; a scope without a rate is not throttled.
+    from library_service_api.throttling import TokenBucketThrottle
+
+    TokenBucketThrottle.THROTTLE_RATES = dict.fromkeys(
+        TokenBucketThrottle.THROTTLE_RATES
+    )
+
+
+@contextmanager
+def benchmark_database(keepdb: bool = False):
+    from django.db import connection
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, keepdb=keepdb
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=keepdb
+        )
+
+
+def percentile(values: list, percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+
+    return ordered[index]
+
+
+def measure(name: str, func, runs: int, warmup: int = 3, **extra) -> dict:
+    """Call `func` `runs` times and return latency statistics in ms"""
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "name": name,
+        "runs": runs,
+        "mean_ms": round(statistics.mean(timings), 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        **extra,
+    }
+
+
+def run_load(func, concurrency: int, duration: float) -> list[float]:
+    """Call `func` from `concurrency` threads for `duration` seconds
+
+    `func` gets the client thread index. Returns every latency in ms.
+    """
+    timings = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(index):
+        local = []
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            func(index)
+            local.append((time.perf_counter() - started) * 1000)
+
+        with lock:
+            timings.extend(local)
+
+    threads = [
+        threading.Thread(target=client, args=(index,))
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return timings
+
+
+def throughput(name: str, timings: list, duration: float, **extra) -> dict:
+    """Summarise `run_load` latencies with the requests per second"""
+    return {
+        "name": name,
+        "runs": len(timings),
+        "requests_per_sec": round(len(timings) / duration, 1),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        **extra,
+    }
+
+
+def report(
+    results: list[dict],
+    output: str = None,
+    columns: tuple = ("name", "mean_ms", "p50_ms", "p95_ms", "p99_ms"),
+    metadata: dict = None,
+) -> None:
+    """
+    Print a results table, and dump them as JSON if `output` is set.
+
+    With `metadata` the JSON is an object holding both, so runs can be
+    told apart when they are compared later.
+    """
+    width = max([len(result["name"]) for result in results] + [4])
+
+    sys.stdout.write(
+        f"{columns[0]:<{width}}"
+        + "".join(f"{column:>{max(12, len(column) + 2)}}"
+                  for column in columns[1:])
+        + "\n"
+    )
+    for result in results:
+        sys.stdout.write(
+            f"{result['name']:<{width}}"
+            + "".join(f"{result[column]:>{max(12, len(column) + 2)}}"
+                      for column in columns[1:])
+            + "\n"
+        )
+
+    if output:
+        with open(output, "w") as file:
+            json.dump(
+                results if metadata is None
+                else {"metadata": metadata, "results": results},
+                file,
+                indent=2,
+            )
@@ -0,0 +1,149 @@
+"""
+Borrowing list latency with and without the `Borrowing.Meta.indexes`.
+
+Seeds a PostgreSQL benchmark database with generate_series, then times
+the `GET /api/borrowings/` filter paths twice: once with the indexes, and
+once inside a transaction that drops them and is rolled back afterwards.
+
+    python -m benchmarks.borrowing_indexes --borrowings 1000000
+"""
+import argparse
+import random
+
+from benchmarks.base import (
+    benchmark_database,
+    measure,
+    report,
+    setup_django,
+)
+
+
+def seed(connection, users: int, books: int, borrowings: int) -> None:
+    from books.models import Book
+    from borrowings.models import Borrowing
+    from users.models import User
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {User._meta.db_table}
+                (password, is_superuser, email, first_name, last_name,
+                 is_staff, is_active, date_joined)
+            SELECT '!', false, 'bench' || g || '@example.com', '', '',
+                   false, true, now()
+            FROM generate_series(1, %s) AS g
+            """,
+            [users],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {Book._meta.db_table}
+                (title, author, cover, inventory, daily_fee)
+            SELECT 'Book ' || g, 'Author ' || g %% 1000,
+                   CASE WHEN g %% 2 = 0 THEN 'SF' ELSE 'HR' END, 10, 1.50
+            FROM generate_series(1, %s) AS g
+            """,
+            [books],
+        )
+        # Every 10th borrowing is still active, the rest were returned
+        # somewhere between the borrow and the expected return date.
+        cursor.execute(
+            f"""
+            INSERT INTO {Borrowing._meta.db_table}
+                (borrow_date, expected_return_date, actual_return_date,
+                 book_id, user_id)
+            SELECT day, day + 14,
+                   CASE WHEN g %% 10 = 0 THEN NULL ELSE day + g %% 14 END,
+                   (SELECT min(id) FROM {Book._meta.db_table}) + g %% %s,
+                   (SELECT min(id) FROM {User._meta.db_table}) + g %% %s
+            FROM generate_series(1, %s) AS g,
+                 LATERAL (SELECT DATE '2024-01-01' + g %% 900 AS day) AS d
+            """,
+            [books, users, borrowings],
+        )
+        cursor.execute(f"ANALYZE {User._meta.db_table}")
+        cursor.execute(f"ANALYZE {Book._meta.db_table}")
+        cursor.execute(f"ANALYZE {Borrowing._meta.db_table}")
+
+
+def run_cases(label: str, runs: int) -> list[dict]:
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from users.models import User
+
+    url = reverse("borrowing:borrowing-list")
+    user_ids = list(User.objects.values_list("id", flat=True)[:1000])
+    staff = User(id=user_ids[0], email="staff@example.com", is_staff=True)
+    users = {user_id: User(id=user_id) for user_id in user_ids}
+
+    def list_borrowings(user, params):
+        client = APIClient()
+        client.force_authenticate(user)
+
+        def request():
+            client.force_authenticate(
+                users[random.choice(user_ids)] if user is None else user
+            )
+            query = {
+                key: random.choice(user_ids) if value is None else value
+                for key, value in params.items()
+            }
+            client.get(url, query)
+
+        return request
+
+    cases = {
+        "user": (None, {}),
+        "user is_active": (None, {"is_active": "true"}),
+        "staff": (staff, {}),
+        "staff is_active": (staff, {"is_active": "true"}),
+        "staff user_id": (staff, {"user_id": None}),
+        "staff user_id is_active": (
+            staff,
+            {"user_id": None, "is_active": "true"},
+        ),
+        "staff -borrow_date": (staff, {"ordering": "-borrow_date"}),
+    }
+
+    return [
+        measure(f"{label}: {name}", list_borrowings(*case), runs)
+        for name, case in cases.items()
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--borrowings", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.db import transaction
+
+    from borrowings.models import Borrowing
+
+    with benchmark_database() as connection:
+        if connection.vendor != "postgresql":
+            raise SystemExit("This benchmark requires PostgreSQL.")
+
+        seed(connection, args.users, args.books, args.borrowings)
+        results = run_cases("indexed", args.runs)
+
+        with transaction.atomic():
+            with connection.schema_editor() as schema_editor:
+                for index in Borrowing._meta.indexes:
+                    schema_editor.remove_index(Borrowing, index)
+
+            results += run_cases("no indexes", args.runs)
+            transaction.set_rollback(True)
+
+    report(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compare two result files written by the benchmarks with `--output`.
+
+Prints, per case present in both, the median latency before and after and
+the relative change, plus the query counts when they were recorded.
+
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+
+from benchmarks.base import report
+
+
+def load(path: str) -> tuple[dict, dict]:
+    with open(path) as file:
+        data = json.load(file)
+
+    if isinstance(data, list):
+        data = {"metadata": {}, "results": data}
+
+    return data["metadata"], {
+        result["name"]: result for result in data["results"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    before_metadata, before = load(args.before)
+    after_metadata, after = load(args.after)
+
+    for label, metadata in (
+        ("before", before_metadata),
+        ("after", after_metadata),
+    ):
+        if metadata:
+            print(
+                f"{label}: {metadata.get('commit')} on "
+                f"{metadata.get('vendor')}, {metadata.get('date')}"
+            )
+
+    rows = []
+    for name, old in before.items():
+        new = after.get(name)
+        if new is None:
+            continue
+
+        rows.append(
+            {
+                "name": name,
+                "before_p50_ms": old["p50_ms"],
+                "after_p50_ms": new["p50_ms"],
+                "change": f"{(new['p50_ms'] / old['p50_ms'] - 1) * 100:+.1f}%",
+                "queries": f"{old.get('queries', '-')} -> "
+                           f"{new.get('queries', '-')}",
+            }
+        )
+
+    report(
+        rows,
+        columns=(
+            "name",
+            "before_p50_ms",
+            "after_p50_ms",
+            "change",
+            "queries",
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Request throughput with per-request, persistent and pooled connections.
+
+Starts the WSGI application in a subprocess per connection mode, served
+by a fixed set of worker threads (like gunicorn's gthread worker), and
+hammers `GET /api/borrowings/` from `--concurrency` client threads:
+
+    no persistence  CONN_MAX_AGE = 0, a new connection per request
+    persistent      CONN_MAX_AGE = 60, one connection per worker thread
+    pool            the postgresql_pool backend, shared by all threads
+
+    python -m benchmarks.connections --concurrency 16 --duration 10
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import TCPServer
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from benchmarks.base import (
+    benchmark_database,
+    report,
+    run_load,
+    setup_django,
+    throughput,
+)
+
+MODES = {
+    "no persistence": {
+        "POSTGRES_CONN_MAX_AGE": "0",
+        "POSTGRES_POOL_MAX_SIZE": "0",
+    },
+    "persistent": {
+        "POSTGRES_CONN_MAX_AGE": "60",
+        "POSTGRES_POOL_MAX_SIZE": "0",
+    },
+    "pool": {
+        "POSTGRES_CONN_MAX_AGE": "0",
+        "POSTGRES_POOL_MAX_SIZE": None,
+    },
+}
+
+
+class WorkerPoolWSGIServer(WSGIServer):
+    """WSGI server that handles requests in a fixed pool of threads."""
+
+    request_queue_size = 128
+
+    def __init__(self, address, threads: int):
+        self.executor = ThreadPoolExecutor(threads)
+        super().__init__(address, QuietRequestHandler)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int, threads: int) -> None:
+    os.environ.setdefault(
+        "DJANGO_SETTINGS_MODULE", "library_service_api.settings"
+    )
+
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+
+    settings.ALLOWED_HOSTS = ["127.0.0.1"]
+    TCPServer.allow_reuse_address = True
+    server = WorkerPoolWSGIServer(("127.0.0.1", port), threads)
+    server.set_app(get_wsgi_application())
+    server.serve_forever()
+
+
+def seed(users: int, borrowings: int) -> list[str]:
+    """Create users with borrowing history and return their tokens"""
+    import datetime
+
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from books.models import Book
+    from borrowings.models import Borrowing
+    from users.models import User
+
+    book = Book.objects.create(
+        title="Book", author="Author", cover="HR", inventory=10, daily_fee=1
+    )
+    today = datetime.date.today()
+    tokens = []
+
+    for number in range(users):
+        user = User.objects.create_user(f"bench{number}@example.com", "pass")
+        Borrowing.objects.bulk_create(
+            Borrowing(
+                book=book,
+                user=user,
+                borrow_date=today,
+                expected_return_date=today + datetime.timedelta(days=14),
+            )
+            for _ in range(borrowings)
+        )
+        tokens.append(str(AccessToken.for_user(user)))
+
+    return tokens
+
+
+def wait_for_port(port: int, process, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("The benchmark server exited early.")
+        try:
+            socket.create_connection(("127.0.0.1", port), 0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+
+    raise SystemExit("The benchmark server did not start.")
+
+
+def get_borrowings(port: int, tokens: list):
+    def request(index):
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        connection.request(
+            "GET",
+            "/api/borrowings/",
+            headers={"Authorize": f"Bearer {tokens[index % len(tokens)]}"},
+        )
+        response = connection.getresponse()
+        response.read()
+        connection.close()
+        if response.status != 200:
+            raise RuntimeError(f"Unexpected status {response.status}")
+
+    return request
+
+
+def run_mode(name: str, args, database: str, tokens: list) -> dict:
+    env = {
+        **os.environ,
+        **{
+            key: value or str(args.threads)
+            for key, value in MODES[name].items()
+        },
+        "POSTGRES_DB": database,
+    }
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.connections",
+            "--serve", "--port", str(args.port),
+            "--threads", str(args.threads),
+        ],
+        env=env,
+    )
+    try:
+        wait_for_port(args.port, process)
+        request = get_borrowings(args.port, tokens)
+        run_load(request, args.concurrency, 1)
+        timings = run_load(request, args.concurrency, args.duration)
+    finally:
+        process.terminate()
+        process.wait()
+
+    return throughput(name, timings, args.duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--borrowings", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.port, args.threads)
+
+    setup_django()
+
+    with benchmark_database() as connection:
+        if connection.vendor != "postgresql":
+            raise SystemExit("This benchmark requires PostgreSQL.")
+
+        tokens = seed(args.users, args.borrowings)
+        database = connection.settings_dict["NAME"]
+        # Let the servers use the benchmark database while it is alive.
+        connection.close()
+        results = [
+            run_mode(name, args, database, tokens) for name in MODES
+        ]
+
+    report(
+        results,
+        args.output,
+        columns=("name", "requests_per_sec", "mean_ms", "p50_ms", "p99_ms"),
+    )
+
+
+if __name__ == "__main__":
+    main()
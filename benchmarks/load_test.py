@@ -0,0 +1,107 @@
+"""
+Load test a running server and report throughput and latency.
+
+Logs in with the given credentials, then hammers the book list, a book
+detail and the borrowing list from `--concurrency` client threads, each
+keeping its HTTP connection alive like a browser or proxy would:
+
+    gunicorn -c gunicorn.conf.py &
+    python -m benchmarks.load_test --url http://127.0.0.1:8080 \\
+        --email admin@example.com --password secret --duration 30
+"""
+import argparse
+import http.client
+import json
+import threading
+from urllib.parse import urlsplit
+
+from benchmarks.base import report, run_load, throughput
+
+
+class Client(threading.local):
+    """An HTTP client with one keep-alive connection per thread."""
+
+    def __init__(self, url: str, token: str = None):
+        parts = urlsplit(url)
+        connection_class = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.connection = connection_class(parts.netloc, timeout=30)
+        self.token = token
+
+    def request(self, method: str, path: str, body: dict = None) -> dict:
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorize"] = f"Bearer {self.token}"
+
+        try:
+            self.connection.request(
+                method,
+                path,
+                body=json.dumps(body) if body is not None else None,
+                headers=headers,
+            )
+            response = self.connection.getresponse()
+            content = response.read()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            raise
+
+        if response.status != 200:
+            raise RuntimeError(f"{method} {path}: status {response.status}")
+
+        return json.loads(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    token = Client(args.url).request(
+        "POST",
+        "/api/users/token/",
+        {"email": args.email, "password": args.password},
+    )["access"]
+    client = Client(args.url, token)
+
+    books = client.request("GET", "/api/books/")["results"]
+    if not books:
+        raise SystemExit("Create at least one book before load testing.")
+
+    cases = {
+        "book list": "/api/books/",
+        "book detail": f"/api/books/{books[0]['id']}/",
+        "borrowing list": "/api/borrowings/",
+    }
+
+    results = []
+    for name, path in cases.items():
+        def request(index, path=path):
+            client.request("GET", path)
+
+        run_load(request, args.concurrency, args.warmup)
+        timings = run_load(request, args.concurrency, args.duration)
+        results.append(
+            throughput(
+                name, timings, args.duration, concurrency=args.concurrency
+            )
+        )
+
+    report(
+        results,
+        args.output,
+        columns=("name", "requests_per_sec", "mean_ms", "p50_ms", "p99_ms"),
+    )
+
+
+if __name__ == "__main__":
+    main()
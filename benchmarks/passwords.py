@@ -0,0 +1,91 @@
+"""
+Registration and login throughput per core for each password hasher.
+
+For every profile of `PASSWORD_HASHER_PROFILES` (argon2, scrypt, pbkdf2),
+calls `POST /api/users/register/` and `POST /api/users/token/` `--runs`
+times in process, one request at a time, with that hasher preferred.
+Both requests are dominated by one password hash, so requests per
+second of a single thread is the throughput of one CPU core.
+
+    python -m benchmarks.passwords --runs 20
+"""
+import argparse
+from itertools import count
+
+from benchmarks.base import (
+    benchmark_database,
+    measure,
+    report,
+    setup_django,
+)
+
+PASSWORD = "bench-password"
+
+
+def run_cases(profile: str, hasher: str, runs: int) -> list[dict]:
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from users.models import User
+
+    client = APIClient()
+    numbers = count()
+    email = f"bench-{profile}@example.com"
+
+    def register():
+        response = client.post(
+            reverse("user:create"),
+            {
+                "email": f"bench-{profile}-{next(numbers)}@example.com",
+                "password": PASSWORD,
+            },
+        )
+        assert response.status_code == 201, response.status_code
+
+    def login():
+        response = client.post(
+            reverse("user:token_obtain_pair"),
+            {"email": email, "password": PASSWORD},
+        )
+        assert response.status_code == 200, response.status_code
+
+    with override_settings(PASSWORD_HASHERS=[hasher]):
+        User.objects.create_user(email, PASSWORD)
+        results = [
+            measure(f"{profile}: register", register, runs),
+            measure(f"{profile}: login", login, runs),
+        ]
+
+    for result in results:
+        result["requests_per_sec"] = round(1000 / result["mean_ms"], 1)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.conf import settings
+
+    with benchmark_database():
+        results = [
+            result
+            for profile, hasher in settings.PASSWORD_HASHER_PROFILES.items()
+            for result in run_cases(profile, hasher, args.runs)
+        ]
+
+    report(
+        results,
+        args.output,
+        columns=("name", "requests_per_sec", "mean_ms", "p50_ms", "p95_ms"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+List serialization cost: `ModelSerializer` versus the `values()` fast path.
+
+Seeds a benchmark database with `--rows` books and borrowings, then times
+fetching, serializing and rendering all of them in one go, the way a list
+page is produced, with:
+
+- model instances through the plain `ModelSerializer` and `JSONRenderer`,
+- `values()` rows through `ValuesListSerializer` and `JSONRenderer`,
+- `values()` rows through `ValuesListSerializer` and `ORJSONRenderer`.
+
+    python -m benchmarks.serializers --rows 10000
+"""
+import argparse
+from datetime import date, timedelta
+from decimal import Decimal
+
+from benchmarks.base import (
+    benchmark_database,
+    measure,
+    report,
+    setup_django,
+)
+
+
+def seed(rows: int) -> None:
+    from books.models import Book
+    from borrowings.models import Borrowing
+    from users.models import User
+
+    user = User.objects.create_user("bench@example.com", "bench")
+    books = Book.objects.bulk_create(
+        Book(
+            title=f"Book {number}",
+            author=f"Author {number % 1000}",
+            cover=Book.Cover.HARD if number % 2 else Book.Cover.SOFT,
+            inventory=10,
+            daily_fee=Decimal("1.50"),
+        )
+        for number in range(rows)
+    )
+    today = date.today()
+    Borrowing.objects.bulk_create(
+        Borrowing(
+            expected_return_date=today + timedelta(days=14),
+            actual_return_date=None if number % 10 else today,
+            book=book,
+            user=user,
+        )
+        for number, book in enumerate(books)
+    )
+
+
+def run_cases(serializer_class, queryset, runs: int) -> list[dict]:
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.serializers import ListSerializer
+
+    from library_service_api.renderers import ORJSONRenderer
+    from library_service_api.serializers import values_fields
+
+    def model_serializer():
+        JSONRenderer().render(
+            ListSerializer(
+                list(queryset), child=serializer_class()
+            ).data
+        )
+
+    def values(renderer_class):
+        def render():
+            renderer_class().render(
+                serializer_class(
+                    list(queryset.values(*values_fields(serializer_class))),
+                    many=True,
+                ).data
+            )
+
+        return render
+
+    name = serializer_class.__name__
+    results = [
+        measure(f"{name}: model serializer", model_serializer, runs),
+        measure(f"{name}: values", values(JSONRenderer), runs),
+        measure(f"{name}: values + orjson", values(ORJSONRenderer), runs),
+    ]
+
+    for result in results:
+        result["speedup"] = round(results[0]["mean_ms"] / result["mean_ms"], 2)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from books.models import Book
+    from books.serializers import BookSerializer
+    from borrowings.models import Borrowing
+    from borrowings.serializers import BorrowingSerializer
+
+    with benchmark_database():
+        seed(args.rows)
+        results = [
+            *run_cases(BookSerializer, Book.objects.order_by("id"), args.runs),
+            *run_cases(
+                BorrowingSerializer,
+                Borrowing.objects.order_by("id"),
+                args.runs,
+            ),
+        ]
+
+    report(
+        results,
+        args.output,
+        columns=("name", "mean_ms", "p50_ms", "p95_ms", "speedup"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from library_service_api.renderers import ORJSONRenderer
+
+CATALOGUE_VERSION_KEY = "books:catalogue-version"
+
+
+def get_catalogue_version() -> int:
+    version = cache.get(CATALOGUE_VERSION_KEY)
+
+    if version is None:
+        cache.add(CATALOGUE_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CATALOGUE_VERSION_KEY, 1)
+
+    return version
+
+
+async def aget_catalogue_version() -> int:
+    version = await cache.aget(CATALOGUE_VERSION_KEY)
+
+    if version is None:
+        await cache.aadd(CATALOGUE_VERSION_KEY, 1, timeout=None)
+        version = await cache.aget(CATALOGUE_VERSION_KEY, 1)
+
+    return version
+
+
+def bump_catalogue_version() -> None:
+    try:
+        cache.incr(CATALOGUE_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOGUE_VERSION_KEY, 1, timeout=None)
+
+
+def invalidate_catalogue() -> None:
+    """
+    Bump the catalogue version after any book write or inventory change.
+
+    The version is bumped again on commit, so responses cached from the
+    old rows while the transaction was still open are not served either.
+    """
+    bump_catalogue_version()
+
+    if connection.in_atomic_block:
+        transaction.on_commit(bump_catalogue_version)
+
+
+class CatalogueCacheMixin:
+    """
+    Cache safe responses of a viewset under the catalogue version.
+
+    Each entry holds the response data and an ETag derived from a digest
+    of its rendered body, so a matching `If-None-Match` gets a 304 only
+    for content this process would serve, without touching the database
+    or the serializer. An ETag therefore never validates content it was
+    not computed from, even when the version key is evicted and starts
+    over. With a per-process cache, a process that missed a version bump
+    serves its stale entry (or 304s for it) until the entry expires
+    after `BOOK_CACHE_TIMEOUT` seconds.
+    """
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request, get_catalogue_version())
+        entry = cache.get(key)
+
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            entry = self.get_cache_entry(response.data)
+            cache.set(key, entry, settings.BOOK_CACHE_TIMEOUT)
+
+        return self.get_entry_response(request, entry)
+
+    async def acached_response(self, handler, request, *args, **kwargs):
+        """`cached_response` for an async handler, using the async cache"""
+        key = self.get_cache_key(request, await aget_catalogue_version())
+        entry = await cache.aget(key)
+
+        if entry is None:
+            response = await handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            entry = self.get_cache_entry(response.data)
+            await cache.aset(key, entry, settings.BOOK_CACHE_TIMEOUT)
+
+        return self.get_entry_response(request, entry)
+
+    @staticmethod
+    def get_cache_key(request, version: int) -> str:
+        digest = md5(request.build_absolute_uri().encode()).hexdigest()
+
+        return f"books:response:{version}:{digest}"
+
+    @staticmethod
+    def get_cache_entry(data) -> tuple[str, object]:
+        """The ETag of `data` (a digest of its JSON body) and `data`"""
+        body = ORJSONRenderer().render(data)
+
+        return quote_etag(md5(body).hexdigest()), data
+
+    @staticmethod
+    def get_entry_response(request, entry: tuple[str, object]) -> Response:
+        etag, data = entry
+
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        return Response(data, headers={"ETag": etag})
@@ -0,0 +1,160 @@
+import csv
+import io
+import json
+import sys
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from rest_framework.exceptions import ValidationError
+
+from books.cache import invalidate_catalogue
+from books.models import Book
+from books.serializers import BookSerializer
+
+UPDATE_FIELDS = ("title", "author", "cover", "inventory", "daily_fee")
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream books from a CSV or JSONL file (or stdin) and upsert them "
+        "in batches. Rows with an `id` update the existing book, "
+        "other rows create new books."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, `-` for stdin")
+        parser.add_argument(
+            "--format",
+            choices=("csv", "jsonl"),
+            help="Input format, guessed from the file extension by default",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # Building the serializer fields is the expensive part,
+        # so a single instance validates every row.
+        self.serializer = BookSerializer()
+        input_format = options["format"] or self.guess_format(options["path"])
+        batch_size = options["batch_size"]
+        started = time.perf_counter()
+        imported = invalid = 0
+
+        with self.open(options["path"]) as file:
+            rows = self.read_rows(file, input_format)
+
+            while batch := list(islice(rows, batch_size)):
+                books, errors = self.validate(batch)
+                self.upsert(books)
+
+                imported += len(books)
+                invalid += len(errors)
+                for line, error in errors:
+                    self.stderr.write(f"Line {line}: {error}")
+
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"Imported {imported} books, {invalid} invalid "
+                    f"({imported / elapsed:.0f} books/s)"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {imported} books imported, {invalid} rows skipped "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+        )
+
+    @staticmethod
+    def guess_format(path: str) -> str:
+        if path.endswith(".csv"):
+            return "csv"
+        if path.endswith((".jsonl", ".ndjson")):
+            return "jsonl"
+
+        raise CommandError("Can't guess the input format, pass --format")
+
+    @staticmethod
+    @contextmanager
+    def open(path: str):
+        if path != "-":
+            with open(path, encoding="utf-8", newline="") as file:
+                yield file
+            return
+
+        # `newline=""` keeps newlines inside quoted CSV fields. The
+        # wrapper is detached, not closed, so stdin stays open.
+        file = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+        try:
+            yield file
+        finally:
+            file.detach()
+
+    @staticmethod
+    def read_rows(file, input_format: str):
+        """Yield `(line number, row)` pairs without reading the whole file"""
+        if input_format == "csv":
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(file, start=1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except json.JSONDecodeError as error:
+                        yield line_number, error
+
+    def validate(self, batch: list) -> tuple[list[Book], list]:
+        books = []
+        errors = []
+
+        for line, row in batch:
+            if not isinstance(row, dict):
+                errors.append((line, row))
+                continue
+
+            book_id = row.get("id") or None
+            if book_id is not None and not str(book_id).isdigit():
+                errors.append((line, {"id": ["A valid integer is required."]}))
+                continue
+
+            try:
+                books.append(
+                    Book(id=book_id, **self.serializer.run_validation(row))
+                )
+            except ValidationError as error:
+                errors.append((line, error.detail))
+
+        return books, errors
+
+    @staticmethod
+    def upsert(books: list[Book]) -> None:
+        # A row can only be upserted once per statement, the last one wins.
+        existing = list(
+            {book.id: book for book in books if book.id is not None}.values()
+        )
+        new = [book for book in books if book.id is None]
+
+        with transaction.atomic():
+            if existing:
+                Book.objects.bulk_create(
+                    existing,
+                    update_conflicts=True,
+                    unique_fields=["id"],
+                    update_fields=UPDATE_FIELDS,
+                )
+                # Explicit ids don't advance the sequence, so move it past
+                # them before new books draw from it.
+                with connection.cursor() as cursor:
+                    for sql in connection.ops.sequence_reset_sql(
+                        no_style(), [Book]
+                    ):
+                        cursor.execute(sql)
+            if new:
+                Book.objects.bulk_create(new)
+
+            invalidate_catalogue()
@@ -0,0 +1,35 @@
+from django.core.management import BaseCommand
+from django.db.models import Max, Min
+
+from books.models import Book
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the borrowed copies and lifetime borrows of every book "
+        "from its borrowings and fix the counters that drifted. The book "
+        "table is walked in primary key ranges, one UPDATE per range."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        fixed = 0
+
+        bounds = Book.objects.aggregate(first=Min("id"), last=Max("id"))
+
+        if bounds["first"] is not None:
+            for start in range(
+                bounds["first"], bounds["last"] + 1, chunk_size
+            ):
+                fixed += Book.objects.reconcile_counters(
+                    Book.objects.filter(
+                        id__gte=start, id__lt=start + chunk_size
+                    )
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Done: {fixed} books had drifted counters")
+        )
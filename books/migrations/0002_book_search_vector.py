@@ -0,0 +1,59 @@
+# Generated by Django 4.2.8 on 2026-10-18 07:12
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+CREATE_SEARCH_VECTOR_TRIGGER = """
+CREATE FUNCTION books_book_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(NEW.author, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER books_book_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, author, search_vector ON books_book
+FOR EACH ROW EXECUTE FUNCTION books_book_search_vector_update();
+
+UPDATE books_book SET title = title;
+
+CREATE INDEX books_book_search_vector_idx
+ON books_book USING gin (search_vector);
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP INDEX IF EXISTS books_book_search_vector_idx;
+DROP TRIGGER IF EXISTS books_book_search_vector_trigger ON books_book;
+DROP FUNCTION IF EXISTS books_book_search_vector_update();
+"""
+
+
+def create_search_vector_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREATE_SEARCH_VECTOR_TRIGGER)
+
+
+def drop_search_vector_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_SEARCH_VECTOR_TRIGGER)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(
+            create_search_vector_trigger, drop_search_vector_trigger
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.8 on 2026-10-18 12:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_borrowings(apps, schema_editor):
+    Book = apps.get_model("books", "Book")
+    Borrowing = apps.get_model("borrowings", "Borrowing")
+
+    def count(borrowings):
+        return Coalesce(
+            Subquery(
+                borrowings.order_by()
+                .values("book_id")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            0,
+        )
+
+    borrowings = Borrowing.objects.filter(book_id=OuterRef("pk"))
+    Book.objects.update(
+        borrowed_copies=count(
+            borrowings.filter(actual_return_date__isnull=True)
+        ),
+        lifetime_borrows=count(borrowings),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0003_book_indexes"),
+        ("borrowings", "0004_borrowing_actual_return_after_borrow"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="borrowed_copies",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="lifetime_borrows",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_borrowings, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["lifetime_borrows", "id"],
+                name="book_lifetime_borrows_id_idx",
+            ),
+        ),
+    ]
@@ -1,6 +1,178 @@
-from django.db import models
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+)
+from django.db import connection, models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest
 from django.utils.translation import gettext_lazy as _
 
+from books.cache import invalidate_catalogue
+
+
+class BookManager(models.Manager):
+    """
+    Inventory changes done as single conditional UPDATE statements.
+
+    Every change also keeps the `borrowed_copies` and `lifetime_borrows`
+    counters in the same statement, so they commit or roll back with it.
+    """
+
+    def search(self, text: str) -> models.QuerySet:
+        """
+        Find books by title or author, matching every word as a prefix.
+
+        On PostgreSQL the stored `search_vector` (kept up to date by a
+        trigger) is queried through its GIN index and results are ordered
+        by rank. Other databases fall back to `icontains` lookups.
+        """
+        terms = re.findall(r"\w+", text)
+        if not terms:
+            return self.none()
+
+        if connection.vendor != "postgresql":
+            lookups = Q()
+            for term in terms:
+                lookups &= Q(title__icontains=term) | Q(author__icontains=term)
+            return self.filter(lookups).order_by("id")
+
+        query = SearchQuery(
+            " & ".join(f"{term}:*" for term in terms),
+            config="simple",
+            search_type="raw",
+        )
+
+        return (
+            self.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "id")
+        )
+
+    def decrease_inventory(self, book_id: int, count: int = 1) -> bool:
+        """
+        Take copies of a book for borrowing, counting them as borrowed,
+        return False if not enough are left
+        """
+        updated = self.filter(pk=book_id, inventory__gte=count).update(
+            inventory=F("inventory") - count,
+            borrowed_copies=F("borrowed_copies") + count,
+            lifetime_borrows=F("lifetime_borrows") + count,
+        )
+        if updated:
+            invalidate_catalogue()
+
+        return bool(updated)
+
+    def increase_inventory(self, book_id: int, count: int = 1) -> None:
+        """Put returned copies of a book back to the inventory"""
+        self.filter(pk=book_id).update(
+            inventory=F("inventory") + count,
+            borrowed_copies=self._fewer_borrowed(count),
+        )
+        invalidate_catalogue()
+
+    def lock_in_bulk(self, book_ids) -> dict:
+        """Lock books in primary key order to avoid deadlocks"""
+        return self.select_for_update().order_by("pk").in_bulk(book_ids)
+
+    def decrease_inventories(self, counts: dict[int, int]) -> None:
+        """Take copies of many books for borrowing with a single UPDATE"""
+        self._change_inventories(counts, sign=-1)
+
+    def increase_inventories(self, counts: dict[int, int]) -> None:
+        """Put returned copies of many books back with a single UPDATE"""
+        self._change_inventories(counts, sign=1)
+
+    def reconcile_counters(self, books: models.QuerySet = None) -> int:
+        """
+        Recount `borrowed_copies` and `lifetime_borrows` of `books` from
+        their borrowings, and fix the ones that drifted with one UPDATE.
+        Returns the number of books fixed.
+        """
+        books = self.all() if books is None else books
+        borrowings = self.model.borrowings.field.model.objects.filter(
+            book_id=OuterRef("pk")
+        )
+        counters = {
+            "borrowed_copies": self._count(
+                borrowings.filter(actual_return_date__isnull=True)
+            ),
+            "lifetime_borrows": self._count(borrowings),
+        }
+
+        with transaction.atomic():
+            # Borrows and returns of the locked books wait, so the recount
+            # sees every borrowing the counters have been changed for.
+            list(
+                books.select_for_update()
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            updated = books.exclude(
+                borrowed_copies=counters["borrowed_copies"],
+                lifetime_borrows=counters["lifetime_borrows"],
+            ).update(**counters)
+
+        if updated:
+            invalidate_catalogue()
+
+        return updated
+
+    def _change_inventories(self, counts: dict[int, int], sign: int) -> None:
+        if not counts:
+            return
+
+        change = Case(
+            *[
+                When(pk=book_id, then=Value(sign * count))
+                for book_id, count in counts.items()
+            ],
+            output_field=models.IntegerField(),
+        )
+        if sign < 0:
+            counters = {
+                "borrowed_copies": F("borrowed_copies") - change,
+                "lifetime_borrows": F("lifetime_borrows") - change,
+            }
+        else:
+            counters = {"borrowed_copies": self._fewer_borrowed(change)}
+
+        self.filter(pk__in=counts).update(
+            inventory=F("inventory") + change, **counters
+        )
+        invalidate_catalogue()
+
+    @staticmethod
+    def _fewer_borrowed(count) -> Greatest:
+        # Borrowings saved without going through the manager (fixtures,
+        # the admin) were never counted, so returning them must not take
+        # the counter below zero; `reconcile_counters` fixes the drift.
+        return Greatest(F("borrowed_copies") - count, Value(0))
+
+    @staticmethod
+    def _count(borrowings: models.QuerySet) -> Coalesce:
+        return Coalesce(
+            Subquery(
+                borrowings.order_by()
+                .values("book_id")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            0,
+        )
+
 
 class Book(models.Model):
     class Cover(models.TextChoices):
@@ -11,7 +183,38 @@ class Book(models.Model):
     author = models.CharField(max_length=255)
     cover = models.CharField(max_length=2, choices=Cover.choices)
     inventory = models.PositiveIntegerField()
+    # Maintained by `BookManager` alongside `inventory`, see
+    # `reconcile_counters` and the `reconcile_book_counters` command.
+    borrowed_copies = models.PositiveIntegerField(default=0, editable=False)
+    lifetime_borrows = models.PositiveIntegerField(default=0, editable=False)
     daily_fee = models.DecimalField(max_digits=8, decimal_places=2)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = BookManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["title", "id"], name="book_title_id_idx"),
+            models.Index(fields=["author", "id"], name="book_author_id_idx"),
+            models.Index(fields=["cover", "id"], name="book_cover_id_idx"),
+            models.Index(
+                fields=["daily_fee", "id"], name="book_daily_fee_id_idx"
+            ),
+            models.Index(
+                fields=["id"],
+                condition=Q(inventory__gt=0),
+                name="book_available_idx",
+            ),
+            models.Index(
+                fields=["lifetime_borrows", "id"],
+                name="book_lifetime_borrows_id_idx",
+            ),
+        ]
+
+    @property
+    def total_copies(self) -> int:
+        """Copies owned by the library, on the shelf or borrowed"""
+        return self.inventory + self.borrowed_copies
 
     def __str__(self) -> str:
         return f"{self.title}. Author {self.author}"
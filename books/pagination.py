@@ -0,0 +1,24 @@
+from library_service_api.pagination import KeysetPagination
+
+
+class BookPagination(KeysetPagination):
+    search_query_param = "q"
+    ordering_choices = {
+        **KeysetPagination.ordering_choices,
+        "title": ("title", "id"),
+        "-title": ("-title", "-id"),
+        "daily_fee": ("daily_fee", "id"),
+        "-daily_fee": ("-daily_fee", "-id"),
+        "lifetime_borrows": ("lifetime_borrows", "id"),
+        "-lifetime_borrows": ("-lifetime_borrows", "-id"),
+    }
+
+    def get_page_queryset(self, queryset, request, view=None):
+        if not request.query_params.get(self.search_query_param):
+            return super().get_page_queryset(queryset, request, view)
+
+        # Search results are ordered by rank, which is neither unique
+        # nor indexed, so they are paged with limit/offset instead.
+        self.fallback = self.fallback_class()
+
+        return queryset
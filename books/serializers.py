@@ -1,9 +1,20 @@
 from rest_framework import serializers
 
 from books.models import Book
+from library_service_api.serializers import ValuesListSerializer
 
 
 class BookSerializer(serializers.ModelSerializer):
     class Meta:
         model = Book
-        fields = ("id", "title", "author", "cover", "inventory", "daily_fee")
+        fields = (
+            "id",
+            "title",
+            "author",
+            "cover",
+            "inventory",
+            "borrowed_copies",
+            "lifetime_borrows",
+            "daily_fee",
+        )
+        list_serializer_class = ValuesListSerializer
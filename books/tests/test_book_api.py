@@ -1,14 +1,24 @@
+from base64 import b64encode
+from unittest import skipUnless
+from urllib.parse import urlencode
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
 from django.urls import reverse
 
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
 from books.models import Book
+from books.pagination import BookPagination
 from books.serializers import BookSerializer
+from books.views import BookViewSet
 
 BOOK_URL = reverse("book:book-list")
+ASYNC_BOOK_URL = reverse("book:book-async-list")
 
 
 def sample_book(**params):
@@ -39,6 +49,7 @@ class UnauthenticatedBookApiTests(TestCase):
 
 class AuthenticatedBookApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             "user@test.com",
@@ -57,6 +68,163 @@ class AuthenticatedBookApiTests(TestCase):
         self.assertEqual(result.status_code, status.HTTP_200_OK)
         self.assertEqual(result.data, serializer.data)
 
+    def test_list_books_paginated_by_cursor(self):
+        books = [sample_book(title=f"Book {index}") for index in range(5)]
+
+        first_page = self.client.get(BOOK_URL, {"limit": 2})
+        second_page = self.client.get(first_page.data["next"])
+
+        self.assertEqual(first_page.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            first_page.data["results"],
+            BookSerializer(books[:2], many=True).data,
+        )
+        self.assertEqual(
+            second_page.data["results"],
+            BookSerializer(books[2:4], many=True).data,
+        )
+        self.assertIsNotNone(second_page.data["previous"])
+
+    def test_list_books_invalid_cursor(self):
+        result = self.client.get(BOOK_URL, {"cursor": "invalid"})
+
+        self.assertEqual(result.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_books_cursor_with_non_scalar_position(self):
+        cursor = b64encode(urlencode({"p": '[{"a": 1}]'}).encode())
+
+        result = self.client.get(BOOK_URL, {"cursor": cursor.decode()})
+
+        self.assertEqual(result.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_books_offset_fallback(self):
+        books = [sample_book(title=f"Book {index}") for index in range(5)]
+
+        result = self.client.get(BOOK_URL, {"offset": 3, "limit": 2})
+
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertEqual(result.data["count"], 5)
+        self.assertEqual(
+            result.data["results"],
+            BookSerializer(books[3:], many=True).data,
+        )
+
+    def test_list_books_served_from_cache(self):
+        sample_book()
+        self.client.get(BOOK_URL)
+
+        with self.assertNumQueries(0):
+            result = self.client.get(BOOK_URL)
+
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(result.data["results"]), 1)
+
+    def test_retrieve_book_not_modified(self):
+        book = sample_book()
+        url = detail_url(book.id)
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(0):
+            result = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(result.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_inventory_change_invalidates_cache(self):
+        book = sample_book()
+        url = detail_url(book.id)
+        etag = self.client.get(url)["ETag"]
+
+        Book.objects.decrease_inventory(book.id)
+        result = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertEqual(result.data["inventory"], book.inventory - 1)
+
+    def test_stale_etag_not_validated_after_version_reset(self):
+        book = sample_book()
+        url = detail_url(book.id)
+        etag = self.client.get(url)["ETag"]
+
+        Book.objects.decrease_inventory(book.id)
+        # The version key was evicted, so the version starts over.
+        cache.clear()
+        result = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertEqual(result.data["inventory"], book.inventory - 1)
+        self.assertNotEqual(result["ETag"], etag)
+
+    def test_search_books_by_title_and_author_prefix(self):
+        hobbit = sample_book(title="The Hobbit", author="J. R. R. Tolkien")
+        sample_book(title="Dune", author="Frank Herbert")
+
+        result = self.client.get(BOOK_URL, {"q": "hobb tolk"})
+
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            result.data["results"], [BookSerializer(hobbit).data]
+        )
+
+    @skipUnless(
+        connection.vendor == "postgresql", "Other databases order by id"
+    )
+    def test_search_books_ranks_title_matches_first(self):
+        by_author = sample_book(title="Letters", author="Dune Fan")
+        by_title = sample_book(title="Dune", author="Frank Herbert")
+
+        result = self.client.get(BOOK_URL, {"q": "dune"})
+
+        self.assertEqual(
+            [book["id"] for book in result.data["results"]],
+            [by_title.id, by_author.id],
+        )
+
+    def test_search_books_after_update(self):
+        book = sample_book(title="Old Title")
+        book.title = "New Title"
+        book.save()
+
+        result = self.client.get(BOOK_URL, {"q": "new"})
+
+        self.assertEqual(result.data["results"][0]["id"], book.id)
+
+    def test_filter_books(self):
+        hard = sample_book(cover="HR", author="Author A", daily_fee=1)
+        soft = sample_book(cover="SF", author="Author A", daily_fee=5)
+        sample_book(cover="HR", author="Author B", daily_fee=1, inventory=0)
+
+        result = self.client.get(
+            BOOK_URL,
+            {"author": "Author A", "daily_fee__lte": "2", "available": "true"},
+        )
+        by_cover = self.client.get(BOOK_URL, {"cover": "SF"})
+
+        self.assertEqual(result.data["results"], [BookSerializer(hard).data])
+        self.assertEqual(by_cover.data["results"], [BookSerializer(soft).data])
+
+    def test_filter_books_invalid_daily_fee(self):
+        result = self.client.get(BOOK_URL, {"daily_fee__lte": "cheap"})
+
+        self.assertEqual(result.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_order_books_by_daily_fee(self):
+        expensive = sample_book(daily_fee=9)
+        cheap = sample_book(daily_fee=1)
+        middle = sample_book(daily_fee=5)
+
+        first_page = self.client.get(
+            BOOK_URL, {"ordering": "-daily_fee", "limit": 2}
+        )
+        second_page = self.client.get(first_page.data["next"])
+
+        self.assertEqual(
+            [book["id"] for book in first_page.data["results"]],
+            [expensive.id, middle.id],
+        )
+        self.assertEqual(
+            [book["id"] for book in second_page.data["results"]], [cheap.id]
+        )
+
     def test_create_book_forbidden(self):
         payload = {
             "title": "Test Book",
@@ -98,6 +266,7 @@ class AuthenticatedBookApiTests(TestCase):
 
 class AdminBookApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             "admin@test.com", "passwordtest", is_staff=True
@@ -130,9 +299,13 @@ class AdminBookApiTests(TestCase):
             "daily_fee": 10.50,
         }
 
+        self.client.get(book_url)
         result = self.client.put(book_url, payload)
 
         self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.client.get(book_url).data["title"], payload["title"]
+        )
 
     def test_delete_book(self):
         book = sample_book()
@@ -141,3 +314,132 @@ class AdminBookApiTests(TestCase):
         res = self.client.delete(book_url)
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class AsyncBookApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@test.com",
+            "passwordtest",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_auth_required(self):
+        self.client.force_authenticate(None)
+
+        result = self.client.get(ASYNC_BOOK_URL)
+
+        self.assertEqual(result.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_list_matches_sync_list(self):
+        for index in range(5):
+            sample_book(title=f"Book {index}", cover="HR" if index else "SF")
+        params = {"cover": "HR", "ordering": "-title", "limit": 2}
+
+        first_page = self.client.get(ASYNC_BOOK_URL, params)
+        second_page = self.client.get(first_page.data["next"])
+        sync_first_page = self.client.get(BOOK_URL, params)
+        sync_second_page = self.client.get(sync_first_page.data["next"])
+
+        self.assertEqual(first_page.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            first_page.data["results"], sync_first_page.data["results"]
+        )
+        self.assertEqual(
+            second_page.data["results"], sync_second_page.data["results"]
+        )
+
+    def test_list_with_offset(self):
+        books = [sample_book(title=f"Book {index}") for index in range(3)]
+
+        result = self.client.get(ASYNC_BOOK_URL, {"offset": 1, "limit": 1})
+
+        self.assertEqual(result.data["count"], 3)
+        self.assertEqual(
+            result.data["results"], BookSerializer(books[1:2], many=True).data
+        )
+
+    def test_list_not_modified(self):
+        sample_book()
+        result = self.client.get(ASYNC_BOOK_URL)
+
+        cached = self.client.get(
+            ASYNC_BOOK_URL, HTTP_IF_NONE_MATCH=result["ETag"]
+        )
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_retrieve_book(self):
+        book = sample_book()
+
+        result = self.client.get(
+            reverse("book:book-async-detail", args=[book.id])
+        )
+
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertEqual(result.data, BookSerializer(book).data)
+
+    def test_retrieve_missing_book(self):
+        for pk in (0, "invalid"):
+            result = self.client.get(
+                reverse("book:book-async-detail", args=[pk])
+            )
+
+            self.assertEqual(result.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_write_not_allowed(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        result = self.client.post(ASYNC_BOOK_URL, {"title": "Book"})
+
+        self.assertEqual(
+            result.status_code, status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN output is Postgres")
+class BookListIndexTests(TestCase):
+    """Every list filter and ordering must be able to use an index."""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def explain(self, params: dict) -> str:
+        request = Request(self.factory.get(BOOK_URL, params))
+        view = BookViewSet(action="list", request=request, format_kwarg=None)
+        ordering = BookPagination().get_ordering(request, None, view)
+
+        queryset = view.filter_queryset(view.get_queryset())
+        return queryset.order_by(*ordering)[:51].explain()
+
+    def assert_uses_index(self, params: dict, index_name: str):
+        plan = self.explain(params)
+
+        self.assertIn(index_name, plan)
+        self.assertNotIn("Seq Scan", plan)
+
+    def test_author_filter_uses_index(self):
+        self.assert_uses_index({"author": "Author"}, "book_author_id_idx")
+
+    def test_cover_filter_uses_index(self):
+        self.assert_uses_index({"cover": "HR"}, "book_cover_id_idx")
+
+    def test_available_filter_uses_partial_index(self):
+        self.assert_uses_index({"available": "true"}, "book_available_idx")
+
+    def test_daily_fee_filter_uses_index(self):
+        self.assert_uses_index(
+            {"daily_fee__lte": "2", "ordering": "daily_fee"},
+            "book_daily_fee_id_idx",
+        )
+
+    def test_title_ordering_uses_index(self):
+        self.assert_uses_index({"ordering": "-title"}, "book_title_id_idx")
+
+    def test_search_uses_gin_index(self):
+        self.assert_uses_index({"q": "dune"}, "books_book_search_vector_idx")
@@ -0,0 +1,72 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from books.models import Book
+from books.tests.test_book_api import BOOK_URL, sample_book
+from borrowings.models import Borrowing
+from borrowings.tests.test_borrowing_api import sample_borrowing
+
+
+class ReconcileBookCountersTests(TestCase):
+    def setUp(self):
+        get_user_model().objects.create_user("user@test.com", "passwordtest")
+
+    def test_reconcile_counts_borrowings(self):
+        book = sample_book()
+        other = sample_book()
+        returned = sample_borrowing(book=book)
+        sample_borrowing(book=book)
+        Borrowing.objects.filter(pk=returned.pk).update(
+            actual_return_date=returned.borrow_date
+        )
+        Book.objects.filter(pk=other.pk).update(
+            borrowed_copies=5, lifetime_borrows=7
+        )
+
+        fixed = Book.objects.reconcile_counters()
+
+        self.assertEqual(fixed, 2)
+        self.assertEqual(
+            list(
+                Book.objects.filter(pk__in=[book.pk, other.pk])
+                .order_by("id")
+                .values_list("borrowed_copies", "lifetime_borrows")
+            ),
+            [(1, 2), (0, 0)],
+        )
+        self.assertEqual(Book.objects.reconcile_counters(), 0)
+
+    def test_command_reconciles_in_chunks(self):
+        books = [sample_book() for _ in range(5)]
+        for book in books:
+            sample_borrowing(book=book)
+        out = StringIO()
+
+        call_command("reconcile_book_counters", chunk_size=2, stdout=out)
+
+        self.assertIn("5 books", out.getvalue())
+        self.assertEqual(
+            set(Book.objects.filter(borrowed_copies=1)), set(books)
+        )
+
+
+class PopularBooksTests(TestCase):
+    def test_order_by_lifetime_borrows(self):
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user(
+                "user@test.com", "passwordtest"
+            )
+        )
+        books = [sample_book(lifetime_borrows=count) for count in (3, 9, 1)]
+
+        result = client.get(BOOK_URL, {"ordering": "-lifetime_borrows"})
+
+        self.assertEqual(
+            [book["id"] for book in result.data["results"]],
+            [books[1].id, books[0].id, books[2].id],
+        )
@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+from io import BytesIO, StringIO, TextIOWrapper
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from books.models import Book
+from books.tests.test_book_api import sample_book
+
+
+class ImportBooksCommandTests(TestCase):
+    def write_file(self, suffix: str, content: str) -> str:
+        file = tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, delete=False, encoding="utf-8"
+        )
+        file.write(content)
+        file.close()
+        self.addCleanup(os.remove, file.name)
+
+        return file.name
+
+    def import_books(self, path, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            "import_books", path, stdout=stdout, stderr=stderr, **options
+        )
+
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_csv_upserts_books(self):
+        book = sample_book()
+        path = self.write_file(
+            ".csv",
+            "id,title,author,cover,inventory,daily_fee\n"
+            f"{book.id},Updated,Author,HR,7,2.50\n"
+            ",New Book,Author,SF,3,1.00\n",
+        )
+
+        self.import_books(path, batch_size=1)
+
+        book.refresh_from_db()
+        self.assertEqual(book.title, "Updated")
+        self.assertEqual(book.inventory, 7)
+        self.assertTrue(Book.objects.filter(title="New Book").exists())
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_import_jsonl_skips_invalid_rows(self):
+        rows = [
+            {
+                "title": "Valid",
+                "author": "Author",
+                "cover": "SF",
+                "inventory": 1,
+                "daily_fee": "1.00",
+            },
+            {"title": "No cover", "author": "Author", "inventory": 1},
+        ]
+        path = self.write_file(
+            ".jsonl",
+            "\n".join(json.dumps(row) for row in rows) + "\nnot json\n",
+        )
+
+        stdout, stderr = self.import_books(path)
+
+        self.assertEqual(Book.objects.count(), 1)
+        self.assertIn("Line 2", stderr)
+        self.assertIn("Line 3", stderr)
+        self.assertIn("1 books imported, 2 rows skipped", stdout)
+
+    def test_new_books_after_import_with_ids(self):
+        path = self.write_file(
+            ".csv",
+            "id,title,author,cover,inventory,daily_fee\n"
+            "1000,Imported,Author,SF,1,1.00\n",
+        )
+
+        self.import_books(path)
+        book = sample_book()
+
+        self.assertGreater(book.id, 1000)
+
+    def test_import_mixes_ids_ahead_of_the_sequence_with_new_books(self):
+        next_id = sample_book().id + 1
+        path = self.write_file(
+            ".csv",
+            "id,title,author,cover,inventory,daily_fee\n"
+            f"{next_id},Imported,Author,SF,1,1.00\n"
+            ",New,Author,SF,1,1.00\n"
+            f"{next_id + 10},Imported,Author,SF,1,1.00\n"
+            ",New,Author,SF,1,1.00\n",
+        )
+
+        self.import_books(path, batch_size=2)
+
+        self.assertEqual(Book.objects.filter(title="Imported").count(), 2)
+        self.assertEqual(Book.objects.filter(title="New").count(), 2)
+
+    def test_import_csv_from_stdin_keeps_newlines_in_quoted_fields(self):
+        stdin = TextIOWrapper(
+            BytesIO(
+                b"title,author,cover,inventory,daily_fee\r\n"
+                b'"Line one\r\nline two",Author,SF,3,1.00\r\n'
+            )
+        )
+
+        with mock.patch("sys.stdin", stdin):
+            self.import_books("-", format="csv")
+
+        self.assertEqual(Book.objects.get().title, "Line one\r\nline two")
+        self.assertFalse(stdin.closed)
@@ -1,8 +1,10 @@
 from rest_framework import routers
 
-from books.views import BookViewSet
+from books.views import AsyncBookViewSet, BookViewSet
 
 router = routers.DefaultRouter()
+# Registered first, so that "async/" is not matched as a detail pk.
+router.register("async", AsyncBookViewSet, basename="book-async")
 router.register("", BookViewSet)
 
 urlpatterns = router.urls
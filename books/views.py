@@ -1,11 +1,133 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import QuerySet
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import (
+    extend_schema,
+    extend_schema_view,
+    OpenApiParameter,
+)
 from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
 
+from books.cache import CatalogueCacheMixin
 from books.models import Book
+from books.pagination import BookPagination
 from books.serializers import BookSerializer
 from books.permissions import IsAdminOrIfAuthenticatedReadOnly
+from library_service_api.async_views import AsyncListRetrieveMixin
+from library_service_api.serializers import values_fields
+
+
+BOOK_LIST_PARAMETERS = [
+    OpenApiParameter(
+        "q",
+        type=OpenApiTypes.STR,
+        description="Search by title and author, ordered by "
+                    "relevance (ex. ?q=tolk ring)",
+    ),
+    OpenApiParameter(
+        "author",
+        type=OpenApiTypes.STR,
+        description="Filter by author (ex. ?author=Frank Herbert)",
+    ),
+    OpenApiParameter(
+        "cover",
+        type=OpenApiTypes.STR,
+        enum=Book.Cover.values,
+        description="Filter by cover (ex. ?cover=HR)",
+    ),
+    OpenApiParameter(
+        "available",
+        type=OpenApiTypes.BOOL,
+        description="Filter by books in stock (ex. ?available=true)",
+    ),
+    OpenApiParameter(
+        "daily_fee__lte",
+        type=OpenApiTypes.DECIMAL,
+        description="Filter by maximum daily fee "
+                    "(ex. ?daily_fee__lte=1.50)",
+    ),
+]
 
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(CatalogueCacheMixin, viewsets.ModelViewSet):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    pagination_class = BookPagination
+
+    def get_queryset(self) -> QuerySet:
+        if self.action != "list":
+            return super().get_queryset()
+
+        search = self.request.query_params.get("q")
+        queryset = (
+            Book.objects.search(search) if search else super().get_queryset()
+        )
+
+        # Listed rows are fetched as dicts and rendered by the fast path
+        # of `ValuesListSerializer` instead of as model instances.
+        return queryset.values(*values_fields(self.get_serializer_class()))
+
+    def filter_queryset(self, queryset) -> QuerySet:
+        if self.action != "list":
+            return queryset
+
+        author = self.request.query_params.get("author")
+        cover = self.request.query_params.get("cover")
+        available = self.request.query_params.get("available")
+        daily_fee_lte = self.request.query_params.get("daily_fee__lte")
+
+        if author:
+            queryset = queryset.filter(author=author)
+        if cover:
+            queryset = queryset.filter(cover=cover)
+        if available:
+            if available.lower() in ("false", "0"):
+                queryset = queryset.filter(inventory=0)
+            else:
+                queryset = queryset.filter(inventory__gt=0)
+        if daily_fee_lte:
+            try:
+                daily_fee_lte = Decimal(daily_fee_lte)
+            except InvalidOperation:
+                daily_fee_lte = None
+
+            if daily_fee_lte is None or not daily_fee_lte.is_finite():
+                raise ValidationError(
+                    {"daily_fee__lte": "A valid number is required."}
+                )
+
+            queryset = queryset.filter(daily_fee__lte=daily_fee_lte)
+
+        return queryset
+
+    @extend_schema(parameters=BOOK_LIST_PARAMETERS)
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+@extend_schema_view(list=extend_schema(parameters=BOOK_LIST_PARAMETERS))
+class AsyncBookViewSet(
+    AsyncListRetrieveMixin,
+    BookViewSet,
+):
+    """Read-only `BookViewSet` served with the async ORM under ASGI"""
+
+    http_method_names = ["get", "head", "options"]
+
+    async def list(self, request, *args, **kwargs):
+        return await self.acached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    async def retrieve(self, request, *args, **kwargs):
+        return await self.acached_response(
+            super().retrieve, request, *args, **kwargs
+        )
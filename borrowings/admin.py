@@ -2,4 +2,7 @@ from django.contrib import admin
 
 from borrowings.models import Borrowing
 
-admin.site.register(Borrowing)
+
+@admin.register(Borrowing)
+class BorrowingAdmin(admin.ModelAdmin):
+    list_select_related = ("book", "user")
@@ -0,0 +1,50 @@
+from django.core.management import BaseCommand
+
+from borrowings.models import Borrowing
+from library_service_api.streaming import (
+    EXPORT_CONTENT_TYPES,
+    STREAM_CHUNK_SIZE,
+    export_chunks,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the borrowing history as CSV or JSON lines. Rows are read "
+        "with a server-side cursor and written chunk by chunk, so memory "
+        "use stays flat however large the table is."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?", default="-", help="Output file, - for stdout"
+        )
+        parser.add_argument(
+            "--format",
+            dest="export_format",
+            choices=list(EXPORT_CONTENT_TYPES),
+            default="csv",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=STREAM_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        chunks = export_chunks(
+            Borrowing.objects.history(),
+            options["export_format"],
+            options["chunk_size"],
+        )
+
+        if options["path"] == "-":
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["path"], "w", newline="", encoding="utf-8") as out:
+            for chunk in chunks:
+                out.write(chunk)
+
+        self.stderr.write(
+            self.style.SUCCESS(f"Exported borrowings to {options['path']}")
+        )
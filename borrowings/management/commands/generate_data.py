@@ -0,0 +1,355 @@
+import io
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, call_command
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from books.models import Book
+from borrowings.models import Borrowing
+from users.models import User
+
+USER_FIELDS = (
+    "email",
+    "password",
+    "is_superuser",
+    "is_staff",
+    "is_active",
+    "first_name",
+    "last_name",
+    "date_joined",
+)
+BOOK_FIELDS = (
+    "title",
+    "author",
+    "cover",
+    "inventory",
+    "daily_fee",
+    "borrowed_copies",
+    "lifetime_borrows",
+)
+BORROWING_FIELDS = (
+    "borrow_date",
+    "expected_return_date",
+    "actual_return_date",
+    "book_id",
+    "user_id",
+)
+
+# Borrowings in the past are only forbidden for new rows, see `history`.
+HISTORY_CONSTRAINT = "borrow_date_gte_or_equal_today"
+
+TITLE_WORDS = (
+    "night", "river", "silent", "empire", "garden", "winter", "shadow",
+    "stone", "glass", "city", "last", "lost", "light", "storm", "song",
+    "house", "sea", "fire", "iron", "star", "road", "dream", "war", "king",
+    "queen", "secret", "forest", "clock", "island", "letter", "mountain",
+    "wolf", "summer", "bridge", "mirror", "crown", "ghost", "harbor",
+)
+FIRST_NAMES = (
+    "Anna", "Boris", "Clara", "Daniel", "Elena", "Frank", "Greta", "Hugo",
+    "Irene", "Jonas", "Karin", "Leo", "Maria", "Nikolai", "Olga", "Pavel",
+    "Rosa", "Stefan", "Tamara", "Viktor",
+)
+LAST_NAMES = (
+    "Adams", "Brown", "Carter", "Dumas", "Evans", "Fischer", "Garcia",
+    "Herbert", "Ivanova", "Jensen", "Kowalski", "Lindqvist", "Moreau",
+    "Novak", "Orwell", "Petrenko", "Quinn", "Rossi", "Shevchenko", "Tolkien",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users, books and borrowings for load tests. "
+        "A few titles and readers account for most borrowings (Zipf "
+        "distributions), borrowings span `--days` of history with a share "
+        "still active, returned late or overdue, and book counters are "
+        "reconciled at the end. Rows are loaded with COPY on PostgreSQL "
+        "and with batched `executemany` INSERTs elsewhere."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--books", type=int, default=100_000)
+        parser.add_argument("--borrowings", type=int, default=1_000_000)
+        parser.add_argument(
+            "--days", type=int, default=365, help="History length in days"
+        )
+        parser.add_argument(
+            "--overdue-ratio",
+            type=float,
+            default=0.03,
+            help="Share of borrowings past their due date still not returned",
+        )
+        parser.add_argument(
+            "--late-ratio",
+            type=float,
+            default=0.15,
+            help="Share of borrowings past their due date returned late",
+        )
+        parser.add_argument(
+            "--popularity",
+            type=float,
+            default=0.8,
+            help="Zipf exponent of book popularity, higher is more skewed",
+        )
+        parser.add_argument(
+            "--password", default="password", help="Password of every user"
+        )
+        parser.add_argument("--batch-size", type=int, default=100_000)
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.started = time.perf_counter()
+        today = date.today()
+
+        with transaction.atomic():
+            self.load(
+                User,
+                USER_FIELDS,
+                self.user_rows(options["users"], options["password"]),
+            )
+        with transaction.atomic():
+            self.load(Book, BOOK_FIELDS, self.book_rows(options["books"]))
+
+        book_ids = self.ranked_ids(Book)
+        user_ids = self.ranked_ids(User)
+
+        with transaction.atomic(), self.history():
+            self.load(
+                Borrowing,
+                BORROWING_FIELDS,
+                self.borrowing_rows(
+                    options["borrowings"],
+                    self.sampler(book_ids, options["popularity"]),
+                    # Heavy readers are less skewed than bestsellers.
+                    self.sampler(user_ids, options["popularity"] / 2),
+                    today,
+                    options,
+                ),
+            )
+
+        if connection.vendor == "postgresql":
+            # Fresh statistics first, the recount plans on them.
+            with connection.cursor() as cursor:
+                for model in (User, Book, Borrowing):
+                    cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+        call_command("reconcile_book_counters", stdout=self.stdout)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done in {time.perf_counter() - self.started:.1f}s"
+            )
+        )
+
+    def load(self, model, fields: tuple, rows) -> None:
+        """Insert `rows` (tuples of `fields`) in batches"""
+        loaded = 0
+
+        while batch := list(islice(rows, self.batch_size)):
+            if connection.vendor == "postgresql":
+                self.copy(model, fields, batch)
+            else:
+                self.insert(model, fields, batch)
+
+            loaded += len(batch)
+            elapsed = time.perf_counter() - self.started
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {loaded} rows "
+                f"({elapsed:.1f}s)"
+            )
+
+    @staticmethod
+    def copy(model, fields: tuple, batch: list) -> None:
+        columns = [model._meta.get_field(field).column for field in fields]
+        buffer = io.StringIO()
+
+        for row in batch:
+            buffer.write(
+                "\t".join(
+                    r"\N" if value is None else str(value) for value in row
+                )
+            )
+            buffer.write("\n")
+
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {model._meta.db_table} ({', '.join(columns)}) "
+                f"FROM STDIN",
+                buffer,
+            )
+
+    @staticmethod
+    def insert(model, fields: tuple, batch: list) -> None:
+        # Not bulk_create: `pre_save` would overwrite every `borrow_date`
+        # (`auto_now_add`) with today.
+        quote_name = connection.ops.quote_name
+        columns = [
+            quote_name(model._meta.get_field(field).column)
+            for field in fields
+        ]
+
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {quote_name(model._meta.db_table)} "
+                f"({', '.join(columns)}) "
+                f"VALUES ({', '.join(['%s'] * len(columns))})",
+                batch,
+            )
+
+    @contextmanager
+    def history(self):
+        """
+        Allow borrowings dated in the past while loading.
+
+        On PostgreSQL the constraint is dropped and added back `NOT VALID`
+        in the same transaction, so it still applies to new rows. The
+        foreign keys are dropped as well: checking them again with one
+        join when they are added back is much faster than queueing a
+        deferred check for every loaded row. SQLite skips CHECK
+        constraints for the connection instead.
+        """
+        table = Borrowing._meta.db_table
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT conname, pg_get_constraintdef(oid), contype "
+                    "FROM pg_constraint WHERE conrelid = %s::regclass "
+                    "AND (contype = 'f' OR conname = %s)",
+                    [table, HISTORY_CONSTRAINT],
+                )
+                constraints = cursor.fetchall()
+                for name, _, _ in constraints:
+                    cursor.execute(
+                        f"ALTER TABLE {table} DROP CONSTRAINT {name}"
+                    )
+
+            yield
+
+            with connection.cursor() as cursor:
+                for name, definition, kind in constraints:
+                    cursor.execute(
+                        f"ALTER TABLE {table} ADD CONSTRAINT {name} "
+                        f"{definition}{' NOT VALID' if kind == 'c' else ''}"
+                    )
+        elif connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA ignore_check_constraints = ON")
+            try:
+                yield
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute("PRAGMA ignore_check_constraints = OFF")
+        else:
+            yield
+
+    def user_rows(self, count: int, password: str):
+        # Hashing is slow on purpose, so every user shares one hash.
+        password = make_password(password)
+        first = (User.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+        joined = timezone.now().isoformat()
+
+        for number in range(first, first + count):
+            yield (
+                f"reader{number}@example.com",
+                password,
+                False,
+                False,
+                True,
+                self.random.choice(FIRST_NAMES),
+                self.random.choice(LAST_NAMES),
+                joined,
+            )
+
+    def book_rows(self, count: int):
+        authors = [
+            f"{self.random.choice(FIRST_NAMES)} "
+            f"{self.random.choice(LAST_NAMES)}"
+            for _ in range(max(count // 20, 1))
+        ]
+
+        for _ in range(count):
+            words = self.random.sample(TITLE_WORDS, self.random.randint(1, 4))
+            yield (
+                " ".join(words).capitalize(),
+                self.random.choice(authors),
+                self.random.choice(Book.Cover.values),
+                self.random.randint(0, 10),
+                f"{self.random.randint(10, 500) / 100:.2f}",
+                0,
+                0,
+            )
+
+    def ranked_ids(self, model) -> list[int]:
+        """Every id of `model` in a random popularity order"""
+        ids = list(model.objects.values_list("id", flat=True))
+        self.random.shuffle(ids)
+
+        return ids
+
+    def sampler(self, ids: list[int], exponent: float):
+        """Draw ids in batches, the first ones the most often"""
+        cum_weights = list(
+            accumulate(1 / rank ** exponent for rank in range(1, len(ids) + 1))
+        )
+
+        def draw(count: int) -> list[int]:
+            return self.random.choices(ids, cum_weights=cum_weights, k=count)
+
+        return draw
+
+    def borrowing_rows(
+        self, count: int, books, users, today: date, options: dict
+    ):
+        days = options["days"]
+        overdue_ratio = options["overdue_ratio"]
+        late_ratio = overdue_ratio + options["late_ratio"]
+        dates = {}
+
+        def day(offset: int) -> str:
+            if offset not in dates:
+                dates[offset] = (today + timedelta(days=offset)).isoformat()
+            return dates[offset]
+
+        randint = self.random.randint
+        chance = self.random.random
+
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+
+            for book_id, user_id in zip(books(size), users(size)):
+                borrowed = -randint(0, days)
+                expected = borrowed + randint(7, 30)
+
+                if expected >= 0:
+                    # Not due yet: most are still out.
+                    returned = (
+                        None if chance() < 0.8 else randint(borrowed, 0)
+                    )
+                else:
+                    outcome = chance()
+                    if outcome < overdue_ratio:
+                        returned = None
+                    elif outcome < late_ratio:
+                        returned = min(expected + randint(1, 14), 0)
+                    else:
+                        returned = randint(borrowed, expected)
+
+                yield (
+                    day(borrowed),
+                    day(expected),
+                    None if returned is None else day(returned),
+                    book_id,
+                    user_id,
+                )
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.8 on 2026-10-18 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("borrowings", "0003_borrowing_indexes"),
+    ]
+
+    operations = [
+        # Late returns are allowed now, they are fined instead.
+        migrations.RemoveConstraint(
+            model_name="borrowing",
+            name="actual_return_between_borrow_and_expected",
+        ),
+        migrations.AddConstraint(
+            model_name="borrowing",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    ("actual_return_date__gte", models.F("borrow_date"))
+                ),
+                name="actual_return_after_borrow",
+            ),
+        ),
+    ]
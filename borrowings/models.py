@@ -1,13 +1,126 @@
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Q, CheckConstraint, F
+from django.db.models import (
+    CheckConstraint,
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    Func,
+    IntegerField,
+    Q,
+    Sum,
+    Value,
+)
 
 from books.models import Book
 
 
+class DaysBetween(Func):
+    """Whole days from the second date expression to the first one"""
+
+    arg_joiner = " - "
+    template = "(%(expressions)s)"
+    output_field = IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler,
+            connection,
+            template="CAST(julianday(%(expressions)s) AS INTEGER)",
+            arg_joiner=") - julianday(",
+            **extra_context,
+        )
+
+
+class FeeField(DecimalField):
+    """
+    Decimal output field that keeps its decimal places on every backend.
+
+    SQLite returns computed decimals as floats, so `105.00` would come
+    back as `Decimal("105")`; values are quantized when they are read.
+    """
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+
+        return value.quantize(Decimal(1).scaleb(-self.decimal_places))
+
+
+class BorrowingManager(models.Manager):
+    """Reports aggregated by the database instead of in Python."""
+
+    overdue_report_groups = {
+        "user": {"email": F("user__email")},
+        "book": {"title": F("book__title"), "author": F("book__author")},
+    }
+    history_fields = (
+        "id",
+        "borrow_date",
+        "expected_return_date",
+        "actual_return_date",
+        "book_id",
+        "book__title",
+        "user_id",
+        "user__email",
+    )
+
+    def overdue(self, today: date = None) -> models.QuerySet:
+        """Borrowings not returned by their expected return date"""
+        return self.filter(
+            actual_return_date__isnull=True,
+            expected_return_date__lt=today or date.today(),
+        )
+
+    def overdue_report(
+        self, group_by: str, today: date = None
+    ) -> models.QuerySet:
+        """
+        Overdue counts, days and accrued fees per user or per book.
+
+        The fee of a borrowing is `Book.daily_fee` times its days overdue.
+        Rows come out as dicts, the most indebted first.
+        """
+        today = today or date.today()
+        days_overdue = DaysBetween(
+            Value(today), F("expected_return_date")
+        )
+
+        return (
+            self.overdue(today)
+            .values(
+                f"{group_by}_id", **self.overdue_report_groups[group_by]
+            )
+            .annotate(
+                overdue_count=Count("id"),
+                days_overdue=Sum(days_overdue),
+                accrued_fees=Sum(
+                    ExpressionWrapper(
+                        days_overdue * F("book__daily_fee"),
+                        output_field=FeeField(
+                            max_digits=12, decimal_places=2
+                        ),
+                    )
+                ),
+            )
+            .order_by("-accrued_fees", f"{group_by}_id")
+        )
+
+    def history(self, borrowings: models.QuerySet = None) -> models.QuerySet:
+        """
+        Flat borrowing history rows for export, with the book title and
+        the user email joined in. Rows come out as dicts in id order.
+        """
+        borrowings = self.all() if borrowings is None else borrowings
+
+        return borrowings.values(*self.history_fields).order_by("id")
+
+
 class Borrowing(models.Model):
     borrow_date = models.DateField(auto_now_add=True)
     expected_return_date = models.DateField()
@@ -23,7 +136,34 @@ class Borrowing(models.Model):
         related_name="borrowings",
     )
 
+    objects = BorrowingManager()
+
     class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "id"],
+                name="borrowing_user_id_idx",
+            ),
+            models.Index(
+                fields=["borrow_date", "id"],
+                name="borrowing_borrow_date_id_idx",
+            ),
+            models.Index(
+                fields=["id"],
+                condition=Q(actual_return_date__isnull=True),
+                name="borrowing_active_idx",
+            ),
+            models.Index(
+                fields=["user", "id"],
+                condition=Q(actual_return_date__isnull=True),
+                name="borrowing_active_user_idx",
+            ),
+            models.Index(
+                fields=["expected_return_date"],
+                condition=Q(actual_return_date__isnull=True),
+                name="borrowing_active_expected_idx",
+            ),
+        ]
         constraints = [
             CheckConstraint(
                 check=Q(borrow_date__gte=datetime.now().date()),
@@ -34,19 +174,31 @@ class Borrowing(models.Model):
                 name="expected_return_after_borrow",
             ),
             CheckConstraint(
-                check=Q(
-                    actual_return_date__gte=F("borrow_date"),
-                    actual_return_date__lte=F("expected_return_date"),
-                ),
-                name="actual_return_between_borrow_and_expected",
+                check=Q(actual_return_date__gte=F("borrow_date")),
+                name="actual_return_after_borrow",
             ),
         ]
 
     @staticmethod
     def validate_book_inventory(book, error_to_raise):
         if book.inventory <= 0:
+            Borrowing.raise_book_unavailable(book, error_to_raise)
+
+    @staticmethod
+    def raise_book_unavailable(book, error_to_raise):
+        raise error_to_raise(
+            {"message": Borrowing.book_unavailable_message(book)}
+        )
+
+    @staticmethod
+    def book_unavailable_message(book) -> str:
+        return f"All books with name '{book.title}' borrowing."
+
+    @staticmethod
+    def validate_expected_return_date(expected_return_date, error_to_raise):
+        if expected_return_date < datetime.now().date():
             raise error_to_raise(
-                {"message": f"All books with name '{book.title}' borrowing."}
+                "Expected return date can't be earlier than borrow date"
             )
 
     def clean(self):
@@ -58,8 +210,16 @@ class Borrowing(models.Model):
         force_update=False,
         using=None,
         update_fields=None,
+        validate=True,
     ):
-        if self.pk is None:
+        """
+        Validate new borrowings before saving them.
+
+        Pass `validate=False` when the data has already been validated,
+        e.g. by `BorrowingCreateSerializer`, to skip the FK existence and
+        constraint queries made by `full_clean()`.
+        """
+        if self.pk is None and validate:
             self.full_clean()
         return super(Borrowing, self).save(
             force_insert, force_update, using, update_fields
@@ -0,0 +1,9 @@
+from library_service_api.pagination import KeysetPagination
+
+
+class BorrowingPagination(KeysetPagination):
+    ordering_choices = {
+        **KeysetPagination.ordering_choices,
+        "borrow_date": ("borrow_date", "id"),
+        "-borrow_date": ("-borrow_date", "-id"),
+    }
@@ -1,14 +1,34 @@
+from collections import Counter
 from datetime import datetime
 
 from django.db import transaction
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from books.models import Book
 from books.serializers import BookSerializer
 from borrowings.models import Borrowing
+from library_service_api.serializers import ValuesListSerializer
+from library_service_api.streaming import EXPORT_CONTENT_TYPES
+from payments.models import Payment
+from users.serializers import UserSerializer
 
 
 class BorrowingSerializer(serializers.ModelSerializer):
+    expandable_fields = {
+        "book": BookSerializer,
+        "user": UserSerializer,
+    }
+
+    def __init__(self, *args, **kwargs):
+        """Embed related objects listed in the `expand` context"""
+        super(BorrowingSerializer, self).__init__(*args, **kwargs)
+
+        for field_name in self.context.get("expand", ()):
+            self.fields[field_name] = self.expandable_fields[field_name](
+                read_only=True
+            )
+
     class Meta:
         model = Borrowing
         fields = (
@@ -19,6 +39,7 @@ class BorrowingSerializer(serializers.ModelSerializer):
             "book_id",
             "user_id",
         )
+        list_serializer_class = ValuesListSerializer
 
 
 class BorrowingDetailSerializer(BorrowingSerializer):
@@ -47,18 +68,37 @@ class BorrowingDetailSerializer(BorrowingSerializer):
         return data
 
     def update(self, instance, validated_data):
+        actual_return_date = datetime.now().date()
+
         with transaction.atomic():
-            instance.actual_return_date = datetime.now().date()
-            instance.save()
+            returned = Borrowing.objects.filter(
+                pk=instance.pk, actual_return_date__isnull=True
+            ).update(actual_return_date=actual_return_date)
 
-            book = instance.book
-            book.inventory += 1
-            book.save()
+            if not returned:
+                raise ValidationError("The book has already been returned")
 
-            return instance
+            Book.objects.increase_inventory(instance.book_id)
+            Payment.objects.calculate(
+                Borrowing.objects.filter(pk=instance.pk)
+            )
+
+        instance.actual_return_date = actual_return_date
+        instance.book.refresh_from_db(
+            fields=["inventory", "borrowed_copies", "lifetime_borrows"]
+        )
+
+        return instance
 
 
 class BorrowingCreateSerializer(BorrowingSerializer):
+    def validate_expected_return_date(self, value):
+        Borrowing.validate_expected_return_date(
+            value, serializers.ValidationError
+        )
+
+        return value
+
     def validate(self, attrs):
         data = super(BorrowingCreateSerializer, self).validate(attrs=attrs)
         Borrowing.validate_book_inventory(attrs["book"], ValidationError)
@@ -75,11 +115,174 @@ class BorrowingCreateSerializer(BorrowingSerializer):
         )
 
     def create(self, validated_data):
+        book = validated_data.get("book")
+
         with transaction.atomic():
-            borrowing = Borrowing.objects.create(**validated_data)
+            # Everything `full_clean()` would check was validated above,
+            # so the borrowing is saved with a single INSERT.
+            borrowing = Borrowing(**validated_data)
+            borrowing.save(force_insert=True, validate=False)
+
+            # The conditional UPDATE goes last to hold the row lock
+            # on a popular book for as short as possible.
+            if not Book.objects.decrease_inventory(book.id):
+                Borrowing.raise_book_unavailable(book, ValidationError)
+
+        return borrowing
+
+
+class BorrowingBulkItemSerializer(serializers.Serializer):
+    book = serializers.IntegerField()
+    borrowing = BorrowingSerializer(required=False)
+    error = serializers.CharField(required=False)
+
+
+class BorrowingBulkCreateSerializer(serializers.Serializer):
+    books = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=100,
+        write_only=True,
+    )
+    expected_return_date = serializers.DateField(write_only=True)
+    results = BorrowingBulkItemSerializer(many=True, read_only=True)
+
+    def validate_expected_return_date(self, value):
+        Borrowing.validate_expected_return_date(
+            value, serializers.ValidationError
+        )
+
+        return value
+
+    def create(self, validated_data):
+        """
+        Borrow every available book of the list in one transaction.
+
+        The books are locked and read with one query, then inventories
+        are decreased with one UPDATE and borrowings saved with one
+        INSERT. Unknown or unavailable books are reported per item.
+        """
+        book_ids = validated_data["books"]
+        results = []
+        borrowings = []
+        taken = Counter()
+
+        with transaction.atomic():
+            books = Book.objects.lock_in_bulk(set(book_ids))
+
+            for book_id in book_ids:
+                book = books.get(book_id)
+
+                if book is None:
+                    results.append(
+                        {"book": book_id, "error": "Book does not exist."}
+                    )
+                elif book.inventory <= taken[book_id]:
+                    results.append(
+                        {
+                            "book": book_id,
+                            "error": Borrowing.book_unavailable_message(book),
+                        }
+                    )
+                else:
+                    taken[book_id] += 1
+                    borrowing = Borrowing(
+                        book=book,
+                        user_id=validated_data["user_id"],
+                        expected_return_date=validated_data[
+                            "expected_return_date"
+                        ],
+                    )
+                    borrowings.append(borrowing)
+                    results.append({"book": book_id, "borrowing": borrowing})
+
+            Book.objects.decrease_inventories(taken)
+            Borrowing.objects.bulk_create(borrowings)
+
+        return {"results": results}
+
+
+class BorrowingBulkReturnItemSerializer(serializers.Serializer):
+    borrowing = serializers.IntegerField()
+    actual_return_date = serializers.DateField(required=False)
+    error = serializers.CharField(required=False)
+
+
+class BorrowingBulkReturnSerializer(serializers.Serializer):
+    borrowings = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=1000,
+        write_only=True,
+    )
+    results = BorrowingBulkReturnItemSerializer(many=True, read_only=True)
+
+    def create(self, validated_data):
+        """
+        Return many borrowings from `queryset` in one transaction.
+
+        The borrowings are locked and read with one query, marked as
+        returned with one UPDATE, the book inventories are restored
+        with one UPDATE grouped per book, and the payments are computed
+        and upserted with one INSERT ... SELECT.
+        """
+        borrowing_ids = list(dict.fromkeys(validated_data["borrowings"]))
+        actual_return_date = datetime.now().date()
+        results = []
+        returned = {}
+
+        with transaction.atomic():
+            borrowings = (
+                validated_data["queryset"]
+                .select_for_update()
+                .order_by("pk")
+                .in_bulk(borrowing_ids)
+            )
+
+            for borrowing_id in borrowing_ids:
+                borrowing = borrowings.get(borrowing_id)
+
+                if borrowing is None:
+                    results.append(
+                        {"borrowing": borrowing_id, "error": "Not found."}
+                    )
+                elif borrowing.actual_return_date:
+                    results.append(
+                        {
+                            "borrowing": borrowing_id,
+                            "error": "The book has already been returned",
+                        }
+                    )
+                else:
+                    returned[borrowing_id] = borrowing.book_id
+                    results.append(
+                        {
+                            "borrowing": borrowing_id,
+                            "actual_return_date": actual_return_date,
+                        }
+                    )
+
+            Borrowing.objects.filter(pk__in=returned).update(
+                actual_return_date=actual_return_date
+            )
+            Book.objects.increase_inventories(Counter(returned.values()))
+            Payment.objects.calculate(
+                Borrowing.objects.filter(pk__in=returned)
+            )
+
+        return {"results": results}
+
+
+class OverdueReportQuerySerializer(serializers.Serializer):
+    group_by = serializers.ChoiceField(
+        choices=list(Borrowing.objects.overdue_report_groups),
+        default="user",
+    )
+    date = serializers.DateField(required=False)
 
-            book = validated_data.get("book")
-            book.inventory -= 1
-            book.save()
 
-            return borrowing
+class BorrowingExportQuerySerializer(serializers.Serializer):
+    file_format = serializers.ChoiceField(
+        choices=list(EXPORT_CONTENT_TYPES),
+        default="csv",
+    )
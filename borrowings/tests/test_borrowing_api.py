@@ -1,13 +1,21 @@
+import csv
+import json
 from datetime import datetime, timedelta
+from io import StringIO
+from threading import Barrier, Thread
+from unittest import skipUnless
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from books.models import Book
+from books.serializers import BookSerializer
 from borrowings.models import Borrowing
 from borrowings.serializers import (
     BorrowingDetailSerializer,
@@ -16,6 +24,11 @@ from borrowings.serializers import (
 from books.tests.test_book_api import sample_book
 
 BORROWING_URL = reverse("borrowing:borrowing-list")
+BULK_BORROWING_URL = reverse("borrowing:borrowing-bulk-create")
+BULK_RETURN_URL = reverse("borrowing:borrowing-bulk-return")
+ASYNC_BORROWING_URL = reverse("borrowing:borrowing-async-list")
+OVERDUE_URL = reverse("borrowing:borrowing-overdue")
+EXPORT_URL = reverse("borrowing:borrowing-export")
 BORROWING_DATE = datetime.now().date()
 EXPECTED_RETURN_DATE = BORROWING_DATE + timedelta(days=10)
 
@@ -27,10 +40,12 @@ def sample_borrowing(**params):
         "borrow_date": BORROWING_DATE,
         "expected_return_date": EXPECTED_RETURN_DATE,
         "book": book,
-        "user_id": 1,
     }
     defaults.update(params)
 
+    if "user" not in defaults and "user_id" not in defaults:
+        defaults["user"] = get_user_model().objects.order_by("id").first()
+
     return Borrowing.objects.create(**defaults)
 
 
@@ -74,11 +89,11 @@ class AuthenticatedBorrowingApiTests(TestCase):
 
         result = self.client.get(BORROWING_URL)
 
-        borrowings = Borrowing.objects.all()
+        borrowings = Borrowing.objects.order_by("id")
         serializer = BorrowingSerializer(borrowings, many=True)
 
         self.assertEqual(result.status_code, status.HTTP_200_OK)
-        self.assertEqual(result.data, serializer.data)
+        self.assertEqual(result.data["results"], serializer.data)
 
     def test_borrowing_detail(self):
         borrowing = sample_borrowing()
@@ -102,6 +117,94 @@ class AuthenticatedBorrowingApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
 
+    def test_create_borrowing_query_count(self):
+        book = sample_book()
+        payload = {
+            "expected_return_date": EXPECTED_RETURN_DATE,
+            "book": book.id,
+        }
+
+        # SELECT book, SAVEPOINT, INSERT borrowing,
+        # UPDATE inventory, RELEASE SAVEPOINT
+        with self.assertNumQueries(5):
+            res = self.client.post(BORROWING_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_create_borrowing_with_past_expected_return_date(self):
+        book = sample_book()
+        payload = {
+            "expected_return_date": BORROWING_DATE - timedelta(days=1),
+            "book": book.id,
+        }
+
+        res = self.client.post(BORROWING_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Borrowing.objects.exists())
+
+    def test_bulk_create_borrowings(self):
+        books = [sample_book(), sample_book(), sample_book(inventory=1)]
+        payload = {
+            "books": [book.id for book in books],
+            "expected_return_date": EXPECTED_RETURN_DATE,
+        }
+
+        with self.assertNumQueries(5):
+            res = self.client.post(BULK_BORROWING_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Borrowing.objects.filter(user=self.user).count(), len(books)
+        )
+        inventories = Book.objects.filter(pk__in=payload["books"]).order_by(
+            "id"
+        )
+        self.assertEqual(
+            list(inventories.values_list("inventory", flat=True)), [1, 1, 0]
+        )
+
+    def test_bulk_create_borrowings_partial_failure(self):
+        book = sample_book(inventory=1)
+        payload = {
+            "books": [book.id, book.id, 999999],
+            "expected_return_date": EXPECTED_RETURN_DATE,
+        }
+
+        res = self.client.post(BULK_BORROWING_URL, payload, format="json")
+
+        results = res.data["results"]
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(results[0]["borrowing"]["book_id"], book.id)
+        self.assertIn("error", results[1])
+        self.assertIn("error", results[2])
+        self.assertEqual(Borrowing.objects.count(), 1)
+        self.assertEqual(Book.objects.get(pk=book.id).inventory, 0)
+
+    def test_bulk_create_borrowings_all_unavailable(self):
+        book = sample_book(inventory=0)
+        payload = {
+            "books": [book.id],
+            "expected_return_date": EXPECTED_RETURN_DATE,
+        }
+
+        res = self.client.post(BULK_BORROWING_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Borrowing.objects.exists())
+
+    def test_bulk_create_borrowings_invalid_item(self):
+        payload = {
+            "books": ["x", sample_book().id],
+            "expected_return_date": EXPECTED_RETURN_DATE,
+        }
+
+        res = self.client.post(BULK_BORROWING_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("0", res.json()["books"])
+        self.assertFalse(Borrowing.objects.exists())
+
     def test_create_borrowing_decreases_book_inventory_by_1(self):
         book = sample_book()
         expected_book_inventory = book.inventory - 1
@@ -136,11 +239,13 @@ class AuthenticatedBorrowingApiTests(TestCase):
 
         result = self.client.get(BORROWING_URL)
 
-        borrowings = Borrowing.objects.filter(user_id=self.user.id)
+        borrowings = Borrowing.objects.filter(user_id=self.user.id).order_by(
+            "id"
+        )
         serializer = BorrowingSerializer(borrowings, many=True)
 
         self.assertEqual(result.status_code, status.HTTP_200_OK)
-        self.assertEqual(result.data, serializer.data)
+        self.assertEqual(result.data["results"], serializer.data)
 
     def test_return_borrowing(self):
         borrowing = sample_borrowing()
@@ -161,6 +266,51 @@ class AuthenticatedBorrowingApiTests(TestCase):
 
         self.assertEqual(result.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_bulk_return_borrowings(self):
+        book = sample_book()
+        borrowings = [
+            sample_borrowing(book=book),
+            sample_borrowing(book=book),
+            sample_borrowing(),
+        ]
+        payload = {"borrowings": [borrowing.id for borrowing in borrowings]}
+
+        with self.assertNumQueries(6):
+            res = self.client.post(BULK_RETURN_URL, payload, format="json")
+
+        book.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(book.inventory, 4)
+        self.assertFalse(
+            Borrowing.objects.filter(actual_return_date__isnull=True).exists()
+        )
+
+    def test_bulk_return_borrowings_partial_failure(self):
+        other_user = sample_user(email="other@test.com")
+        returned = sample_borrowing()
+        active = sample_borrowing()
+        foreign = sample_borrowing(user=other_user)
+        self.client.post(return_url(returned.id))
+        payload = {"borrowings": [active.id, returned.id, foreign.id]}
+
+        res = self.client.post(BULK_RETURN_URL, payload, format="json")
+
+        results = res.data["results"]
+        foreign.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertIn("actual_return_date", results[0])
+        self.assertIn("error", results[1])
+        self.assertIn("error", results[2])
+        self.assertIsNone(foreign.actual_return_date)
+
+    def test_bulk_return_borrowings_invalid_item(self):
+        payload = {"borrowings": ["x"]}
+
+        res = self.client.post(BULK_RETURN_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("0", res.json()["borrowings"])
+
     def test_add_1_to_book_inventory_on_returning(self):
         borrowing = sample_borrowing()
         book = borrowing.book
@@ -174,6 +324,77 @@ class AuthenticatedBorrowingApiTests(TestCase):
         self.assertEqual(inventory_actual, inventory_expected)
 
 
+class BookCountersTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        self.client.force_authenticate(self.user)
+        self.book = sample_book(inventory=3)
+
+    def assert_counters(self, inventory, borrowed_copies, lifetime_borrows):
+        self.book.refresh_from_db()
+        self.assertEqual(
+            (
+                self.book.inventory,
+                self.book.borrowed_copies,
+                self.book.lifetime_borrows,
+            ),
+            (inventory, borrowed_copies, lifetime_borrows),
+        )
+        self.assertEqual(self.book.total_copies, 3)
+
+    def borrow(self) -> int:
+        result = self.client.post(
+            BORROWING_URL,
+            {
+                "book": self.book.id,
+                "expected_return_date": EXPECTED_RETURN_DATE,
+            },
+        )
+
+        return result.data["id"]
+
+    def test_borrow_and_return(self):
+        borrowing_id = self.borrow()
+        self.assert_counters(2, 1, 1)
+
+        result = self.client.post(return_url(borrowing_id))
+
+        self.assertEqual(result.data["book"]["borrowed_copies"], 0)
+        self.assert_counters(3, 0, 1)
+
+    def test_bulk_borrow_and_return(self):
+        result = self.client.post(
+            BULK_BORROWING_URL,
+            {
+                "books": [self.book.id, self.book.id],
+                "expected_return_date": EXPECTED_RETURN_DATE,
+            },
+            format="json",
+        )
+        self.assert_counters(1, 2, 2)
+
+        self.client.post(
+            BULK_RETURN_URL,
+            {
+                "borrowings": [
+                    item["borrowing"]["id"] for item in result.data["results"]
+                ]
+            },
+            format="json",
+        )
+
+        self.assert_counters(3, 0, 2)
+
+    def test_return_of_uncounted_borrowing_keeps_counter_at_zero(self):
+        borrowing = sample_borrowing(book=self.book, user=self.user)
+        Book.objects.filter(pk=self.book.id).update(inventory=2)
+
+        self.client.post(return_url(borrowing.id))
+
+        self.assert_counters(3, 0, 0)
+
+
 class AdminBorrowingApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -189,13 +410,55 @@ class AdminBorrowingApiTests(TestCase):
         sample_borrowing(user_id=user.id)
         sample_borrowing(user_id=self.user.id)
 
-        borrowings = Borrowing.objects.all()
+        borrowings = Borrowing.objects.order_by("id")
         serializer = BorrowingSerializer(borrowings, many=True)
 
         result = self.client.get(BORROWING_URL)
 
         self.assertEqual(result.status_code, status.HTTP_200_OK)
-        self.assertEqual(serializer.data, result.data)
+        self.assertEqual(serializer.data, result.data["results"])
+
+    def test_list_borrowings_paginated_by_borrow_date(self):
+        borrowings = [sample_borrowing() for _ in range(3)]
+        Borrowing.objects.filter(pk=borrowings[0].id).update(
+            borrow_date=BORROWING_DATE - timedelta(days=1)
+        )
+
+        first_page = self.client.get(
+            BORROWING_URL, {"ordering": "-borrow_date", "limit": 2}
+        )
+        second_page = self.client.get(first_page.data["next"])
+
+        self.assertEqual(
+            [borrowing["id"] for borrowing in first_page.data["results"]],
+            [borrowings[2].id, borrowings[1].id],
+        )
+        self.assertEqual(
+            [borrowing["id"] for borrowing in second_page.data["results"]],
+            [borrowings[0].id],
+        )
+        self.assertIsNone(second_page.data["next"])
+
+    def test_list_borrowings_expand_book_and_user(self):
+        borrowing = sample_borrowing(user_id=self.user.id)
+        sample_borrowing(user_id=self.user.id)
+
+        with self.assertNumQueries(1):
+            result = self.client.get(BORROWING_URL, {"expand": "book,user"})
+
+        first = result.data["results"][0]
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertEqual(first["book"], BookSerializer(borrowing.book).data)
+        self.assertEqual(first["user"]["email"], self.user.email)
+        self.assertEqual(first["book_id"], borrowing.book_id)
+
+    def test_list_borrowings_ignores_unknown_expand(self):
+        sample_borrowing()
+
+        result = self.client.get(BORROWING_URL, {"expand": "password"})
+
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertNotIn("password", result.data["results"][0])
 
     def test_filter_borrowings_by_user_id(self):
         user = sample_user()
@@ -210,9 +473,9 @@ class AdminBorrowingApiTests(TestCase):
         serializer_2 = BorrowingSerializer(borrowing_2)
         serializer_3 = BorrowingSerializer(borrowing_3)
 
-        self.assertIn(serializer_1.data, result.data)
-        self.assertIn(serializer_2.data, result.data)
-        self.assertNotIn(serializer_3.data, result.data)
+        self.assertIn(serializer_1.data, result.data["results"])
+        self.assertIn(serializer_2.data, result.data["results"])
+        self.assertNotIn(serializer_3.data, result.data["results"])
 
     def test_filter_borrowings_by_parameter_is_active(self):
         borrowing_1 = sample_borrowing()
@@ -226,6 +489,309 @@ class AdminBorrowingApiTests(TestCase):
         self.client.post(return_url(borrowing_3.id))
         res = self.client.get(BORROWING_URL, {"is_active": True})
 
-        self.assertIn(serializer_1.data, res.data)
-        self.assertIn(serializer_2.data, res.data)
-        self.assertNotIn(serializer_3.data, res.data)
+        self.assertIn(serializer_1.data, res.data["results"])
+        self.assertIn(serializer_2.data, res.data["results"])
+        self.assertNotIn(serializer_3.data, res.data["results"])
+
+
+class AsyncBorrowingApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        self.client.force_authenticate(self.user)
+
+    def test_auth_required(self):
+        self.client.force_authenticate(None)
+
+        result = self.client.get(ASYNC_BORROWING_URL)
+
+        self.assertEqual(result.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_list_only_own_borrowings_with_expand(self):
+        other_user = sample_user(email="other@test.com")
+        own = [sample_borrowing(user=self.user) for _ in range(2)]
+        sample_borrowing(user=other_user)
+
+        result = self.client.get(ASYNC_BORROWING_URL, {"expand": "book"})
+
+        serializer = BorrowingSerializer(
+            own, many=True, context={"expand": ["book"]}
+        )
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertEqual(result.data["results"], serializer.data)
+
+    def test_retrieve_borrowing(self):
+        borrowing = sample_borrowing(user=self.user)
+
+        result = self.client.get(
+            reverse("borrowing:borrowing-async-detail", args=[borrowing.id])
+        )
+
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            result.data, BorrowingDetailSerializer(borrowing).data
+        )
+
+    def test_retrieve_borrowing_of_other_user(self):
+        borrowing = sample_borrowing(
+            user=sample_user(email="other@test.com")
+        )
+
+        result = self.client.get(
+            reverse("borrowing:borrowing-async-detail", args=[borrowing.id])
+        )
+
+        self.assertEqual(result.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class OverdueReportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "passwordtest", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        # Borrowings can't start in the past, so the report is taken
+        # 5 days after the expected return date instead.
+        self.report_date = EXPECTED_RETURN_DATE + timedelta(days=5)
+
+    def get_report(self, **params):
+        result = self.client.get(
+            OVERDUE_URL, {"date": self.report_date, **params}
+        )
+
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+
+        return json.loads(b"".join(result.streaming_content))
+
+    def test_staff_only(self):
+        self.client.force_authenticate(sample_user())
+
+        result = self.client.get(OVERDUE_URL)
+
+        self.assertEqual(result.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_report_per_user(self):
+        user = sample_user()
+        cheap_book = sample_book(daily_fee=2)
+        sample_borrowing(user=user)
+        sample_borrowing(user=user, book=cheap_book)
+        sample_borrowing(user=self.user)
+        returned = sample_borrowing(user=self.user)
+        Borrowing.objects.filter(pk=returned.id).update(
+            actual_return_date=BORROWING_DATE
+        )
+        sample_borrowing(
+            user=self.user,
+            expected_return_date=self.report_date + timedelta(days=1),
+        )
+
+        report = self.get_report()
+
+        self.assertEqual(
+            report,
+            [
+                {
+                    "user_id": user.id,
+                    "email": user.email,
+                    "overdue_count": 2,
+                    "days_overdue": 10,
+                    "accrued_fees": "62.50",
+                },
+                {
+                    "user_id": self.user.id,
+                    "email": self.user.email,
+                    "overdue_count": 1,
+                    "days_overdue": 5,
+                    "accrued_fees": "52.50",
+                },
+            ],
+        )
+
+    def test_report_per_book(self):
+        book = sample_book()
+        sample_borrowing(user=self.user, book=book)
+        sample_borrowing(user=sample_user(), book=book)
+
+        report = self.get_report(group_by="book")
+
+        self.assertEqual(
+            report,
+            [
+                {
+                    "book_id": book.id,
+                    "title": book.title,
+                    "author": book.author,
+                    "overdue_count": 2,
+                    "days_overdue": 10,
+                    "accrued_fees": "105.00",
+                },
+            ],
+        )
+
+    def test_nothing_overdue_today(self):
+        sample_borrowing(user=self.user)
+
+        result = self.client.get(OVERDUE_URL)
+
+        self.assertEqual(json.loads(b"".join(result.streaming_content)), [])
+
+    def test_invalid_group_by(self):
+        result = self.client.get(OVERDUE_URL, {"group_by": "password"})
+
+        self.assertEqual(result.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == "postgresql", "EXPLAIN is Postgres")
+    def test_report_uses_active_expected_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+        plan = Borrowing.objects.overdue_report("user").explain()
+
+        self.assertIn("borrowing_active_expected_idx", plan)
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentBorrowingTests(TransactionTestCase):
+    threads_count = 12
+
+    def _run_concurrently(self, target, args_list):
+        barrier = Barrier(len(args_list))
+
+        def worker(*args):
+            try:
+                barrier.wait()
+                target(*args)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=worker, args=args) for args in args_list]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_concurrent_borrowings_do_not_oversell_book(self):
+        book = sample_book(inventory=5)
+        users = [
+            sample_user(email=f"user{index}@test.com")
+            for index in range(self.threads_count)
+        ]
+        statuses = []
+
+        def borrow(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            result = client.post(
+                BORROWING_URL,
+                {
+                    "expected_return_date": EXPECTED_RETURN_DATE,
+                    "book": book.id,
+                },
+            )
+            statuses.append(result.status_code)
+
+        self._run_concurrently(borrow, [(user,) for user in users])
+
+        book.refresh_from_db()
+        self.assertEqual(statuses.count(status.HTTP_201_CREATED), 5)
+        self.assertEqual(
+            statuses.count(status.HTTP_400_BAD_REQUEST),
+            self.threads_count - 5,
+        )
+        self.assertEqual(book.inventory, 0)
+        self.assertEqual(Borrowing.objects.filter(book=book).count(), 5)
+
+    def test_concurrent_returns_restore_inventory_once(self):
+        user = sample_user()
+        borrowing = sample_borrowing(user=user)
+        Book.objects.filter(pk=borrowing.book_id).update(inventory=0)
+        statuses = []
+
+        def return_book():
+            client = APIClient()
+            client.force_authenticate(user)
+            result = client.post(return_url(borrowing.id))
+            statuses.append(result.status_code)
+
+        self._run_concurrently(
+            return_book, [() for _ in range(self.threads_count)]
+        )
+
+        borrowing.book.refresh_from_db()
+        self.assertEqual(statuses.count(status.HTTP_200_OK), 1)
+        self.assertEqual(borrowing.book.inventory, 1)
+
+
+class BorrowingExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "passwordtest", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+
+    def get_export(self, **params) -> str:
+        result = self.client.get(EXPORT_URL, params)
+
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+
+        return b"".join(result.streaming_content).decode()
+
+    def test_staff_only(self):
+        self.client.force_authenticate(sample_user())
+
+        result = self.client.get(EXPORT_URL)
+
+        self.assertEqual(result.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_csv(self):
+        borrowing = sample_borrowing(user=self.user)
+
+        result = self.client.get(EXPORT_URL)
+        rows = list(csv.DictReader(
+            StringIO(b"".join(result.streaming_content).decode())
+        ))
+
+        self.assertEqual(result["Content-Type"], "text/csv")
+        self.assertIn("borrowings.csv", result["Content-Disposition"])
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], str(borrowing.id))
+        self.assertEqual(rows[0]["book__title"], borrowing.book.title)
+        self.assertEqual(rows[0]["user__email"], self.user.email)
+        self.assertEqual(rows[0]["actual_return_date"], "")
+
+    def test_export_jsonl_filtered(self):
+        user = sample_user()
+        borrowings = [sample_borrowing(user=user) for _ in range(3)]
+        sample_borrowing(user=self.user)
+
+        lines = self.get_export(
+            file_format="jsonl", user_id=user.id
+        ).splitlines()
+
+        self.assertEqual(
+            [json.loads(line)["id"] for line in lines],
+            [borrowing.id for borrowing in borrowings],
+        )
+        self.assertEqual(
+            json.loads(lines[0])["borrow_date"], str(BORROWING_DATE)
+        )
+
+    def test_invalid_format(self):
+        result = self.client.get(EXPORT_URL, {"file_format": "xml"})
+
+        self.assertEqual(result.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_command_writes_every_chunk(self):
+        borrowings = [sample_borrowing(user=self.user) for _ in range(5)]
+        out = StringIO()
+
+        call_command(
+            "export_borrowings", format="jsonl", chunk_size=2, stdout=out
+        )
+
+        self.assertEqual(
+            [json.loads(line)["id"] for line in out.getvalue().splitlines()],
+            [borrowing.id for borrowing in borrowings],
+        )
@@ -0,0 +1,60 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.test import TestCase
+
+from books.models import Book
+from borrowings.models import Borrowing
+from users.models import User
+
+
+class GenerateDataCommandTests(TestCase):
+    def generate(self, **options):
+        options = {
+            "users": 20,
+            "books": 50,
+            "borrowings": 500,
+            "batch_size": 200,
+            "seed": 1,
+            **options,
+        }
+        call_command("generate_data", stdout=StringIO(), **options)
+
+    def test_generates_rows_with_consistent_counters(self):
+        self.generate()
+
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Book.objects.count(), 50)
+        self.assertEqual(Borrowing.objects.count(), 500)
+        self.assertEqual(Book.objects.reconcile_counters(), 0)
+        self.assertTrue(
+            Borrowing.objects.filter(borrow_date__lt=date.today()).exists()
+        )
+        self.assertFalse(
+            Borrowing.objects.filter(
+                Q(expected_return_date__lt=F("borrow_date"))
+                | Q(actual_return_date__lt=F("borrow_date"))
+            ).exists()
+        )
+
+    def test_overdue_ratio(self):
+        self.generate(overdue_ratio=1, late_ratio=0)
+
+        past_due = Borrowing.objects.filter(
+            expected_return_date__lt=date.today()
+        )
+        self.assertTrue(past_due.exists())
+        self.assertFalse(
+            past_due.filter(actual_return_date__isnull=False).exists()
+        )
+
+    def test_history_constraint_still_applies_to_new_rows(self):
+        self.generate(borrowings=10)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Borrowing.objects.filter(
+                pk=Borrowing.objects.values("pk")[:1]
+            ).update(borrow_date=date(2000, 1, 1))
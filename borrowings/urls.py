@@ -1,9 +1,11 @@
 from rest_framework import routers
 
-from borrowings.views import BorrowingViewSet
+from borrowings.views import AsyncBorrowingViewSet, BorrowingViewSet
 
 
 router = routers.DefaultRouter()
+# Registered first, so that "async/" is not matched as a detail pk.
+router.register("async", AsyncBorrowingViewSet, basename="borrowing-async")
 router.register("", BorrowingViewSet)
 
 urlpatterns = router.urls
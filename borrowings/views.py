@@ -2,21 +2,58 @@ from typing import Type
 
 from django.db.models import QuerySet
 from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.utils import (
+    extend_schema,
+    extend_schema_view,
+    OpenApiParameter,
+)
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.serializers import Serializer
 
 from borrowings.models import Borrowing
+from borrowings.pagination import BorrowingPagination
 from borrowings.serializers import (
     BorrowingSerializer,
     BorrowingDetailSerializer,
     BorrowingCreateSerializer,
+    BorrowingBulkCreateSerializer,
+    BorrowingBulkReturnSerializer,
+    OverdueReportQuerySerializer,
+    BorrowingExportQuerySerializer,
+)
+from library_service_api.async_views import AsyncListRetrieveMixin
+from library_service_api.serializers import values_fields
+from library_service_api.streaming import (
+    EXPORT_CONTENT_TYPES,
+    stream_export,
+    stream_json_array,
 )
 
 
+BORROWING_LIST_PARAMETERS = [
+    OpenApiParameter(
+        "user_id",
+        type=OpenApiTypes.INT,
+        description="Filter by user id (ex. ?user_id=1)",
+    ),
+    OpenApiParameter(
+        "is_active",
+        type=OpenApiTypes.BOOL,
+        description="Filter by actual return date "
+                    "(ex. ?is_active=True)",
+    ),
+    OpenApiParameter(
+        "expand",
+        type=OpenApiTypes.STR,
+        description="Embed related objects, comma separated "
+                    "(ex. ?expand=book,user)",
+    ),
+]
+
+
 class BorrowingViewSet(
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -26,16 +63,60 @@ class BorrowingViewSet(
     queryset = Borrowing.objects.all()
     serializer_class = BorrowingSerializer
     permission_classes = (IsAuthenticated,)
+    pagination_class = BorrowingPagination
+
+    @property
+    def throttle_scope(self) -> str | None:
+        """Borrowing books is throttled, reading and returning are not"""
+        if self.action in ("create", "bulk_create"):
+            return "borrow"
+        return None
 
     def get_serializer_class(self) -> Type[Serializer]:
         if self.action in ("retrieve", "return_borrowing"):
             return BorrowingDetailSerializer
         if self.action == "create":
             return BorrowingCreateSerializer
+        if self.action == "bulk_create":
+            return BorrowingBulkCreateSerializer
+        if self.action == "bulk_return":
+            return BorrowingBulkReturnSerializer
         return self.serializer_class
 
+    def get_expand(self) -> list[str]:
+        if self.action != "list":
+            return []
+
+        expand = self.request.query_params.get("expand", "")
+
+        return [
+            field_name
+            for field_name in BorrowingSerializer.expandable_fields
+            if field_name in expand.split(",")
+        ]
+
+    def get_serializer_context(self) -> dict:
+        context = super().get_serializer_context()
+        context["expand"] = self.get_expand()
+
+        return context
+
     def get_queryset(self) -> QuerySet:
-        return self.filter_queryset(self.queryset)
+        queryset = self.queryset
+
+        if self.action in ("retrieve", "return_borrowing"):
+            queryset = queryset.select_related("book")
+        elif self.action == "list":
+            expand = self.get_expand()
+
+            if expand:
+                queryset = queryset.select_related(*expand)
+            else:
+                queryset = queryset.values(
+                    *values_fields(self.get_serializer_class())
+                )
+
+        return self.filter_queryset(queryset)
 
     def filter_queryset(self, queryset) -> QuerySet:
         user = self.request.user
@@ -44,7 +125,7 @@ class BorrowingViewSet(
         if is_active:
             queryset = queryset.filter(actual_return_date__isnull=True)
         if not user.is_staff:
-            queryset = queryset.filter(user=user)
+            queryset = queryset.filter(user_id=user.id)
         else:
             user_id = self.request.query_params.get("user_id")
 
@@ -54,7 +135,7 @@ class BorrowingViewSet(
         return queryset
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
 
     @action(
         methods=["POST"],
@@ -73,20 +154,142 @@ class BorrowingViewSet(
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="bulk",
+        permission_classes=[
+            IsAuthenticated,
+        ],
+    )
+    def bulk_create(self, request):
+        """Borrow several books at once, reporting the result per book"""
+        serializer = self.get_serializer(data=request.data)
+
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user_id=request.user.id)
+
+        return self.get_bulk_response(
+            serializer.data, status.HTTP_201_CREATED
+        )
+
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="bulk-return",
+        permission_classes=[
+            IsAuthenticated,
+        ],
+    )
+    def bulk_return(self, request):
+        """Return several borrowings at once, reporting the result per item"""
+        serializer = self.get_serializer(data=request.data)
+
+        serializer.is_valid(raise_exception=True)
+        serializer.save(queryset=self.get_queryset())
+
+        return self.get_bulk_response(serializer.data, status.HTTP_200_OK)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
-                "user_id",
-                type=OpenApiTypes.INT,
-                description="Filter by user id (ex. ?user_id=1)",
+                "group_by",
+                type=OpenApiTypes.STR,
+                enum=list(Borrowing.objects.overdue_report_groups),
+                description="Aggregate per user (default) or per book "
+                            "(ex. ?group_by=book)",
             ),
             OpenApiParameter(
-                "is_active",
-                type=OpenApiTypes.BOOL,
-                description="Filter by actual return date "
-                            "(ex. ?is_active=True)",
+                "date",
+                type=OpenApiTypes.DATE,
+                description="Report overdue as of this date, today by "
+                            "default (ex. ?date=2024-01-31)",
             ),
-        ]
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="overdue",
+        permission_classes=[
+            IsAdminUser,
+        ],
+    )
+    def overdue(self, request):
+        """
+        Overdue borrowings counted per user or per book, with the days
+        overdue and the fees accrued so far, streamed as a JSON array
+        """
+        serializer = OverdueReportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        return stream_json_array(
+            Borrowing.objects.overdue_report(
+                serializer.validated_data["group_by"],
+                serializer.validated_data.get("date"),
+            )
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "file_format",
+                type=OpenApiTypes.STR,
+                enum=list(EXPORT_CONTENT_TYPES),
+                description="Export as CSV (default) or JSON lines "
+                            "(ex. ?file_format=jsonl)",
+            ),
+            *BORROWING_LIST_PARAMETERS[:2],
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=[
+            IsAdminUser,
+        ],
     )
+    def export(self, request):
+        """
+        Borrowing history streamed as a CSV or JSON lines file, read with
+        a server-side cursor so memory use does not grow with the table
+        """
+        serializer = BorrowingExportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        return stream_export(
+            Borrowing.objects.history(self.get_queryset()),
+            serializer.validated_data["file_format"],
+            "borrowings",
+        )
+
+    @staticmethod
+    def get_bulk_response(data, success_status: int) -> Response:
+        results = data["results"]
+        failed = sum("error" in result for result in results)
+
+        if not failed:
+            response_status = success_status
+        elif failed < len(results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+
+        return Response(data, status=response_status)
+
+    @extend_schema(parameters=BORROWING_LIST_PARAMETERS)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
+
+
+@extend_schema_view(list=extend_schema(parameters=BORROWING_LIST_PARAMETERS))
+class AsyncBorrowingViewSet(
+    AsyncListRetrieveMixin,
+    BorrowingViewSet,
+):
+    """Read-only `BorrowingViewSet` served with the async ORM under ASGI"""
+
+    http_method_names = ["get", "head", "options"]
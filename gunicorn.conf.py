@@ -0,0 +1,51 @@
+"""
+Gunicorn settings for serving the API in production.
+
+    gunicorn -c gunicorn.conf.py
+
+Every setting can be tuned with a `GUNICORN_*` environment variable.
+Workers use the `gthread` class by default, so each process serves
+`threads` requests at once and keeps one database connection per
+thread (or shares a pool, see `POSTGRES_POOL_MAX_SIZE`).
+
+Send `SIGHUP` to the master process for a graceful reload: new workers
+are started and import the current code, and the old ones finish their
+in-flight requests within `graceful_timeout`. The app is deliberately
+not preloaded in the master, which would make reloaded workers fork
+the old code.
+"""
+import multiprocessing
+import os
+
+# With GUNICORN_ASGI=True the ASGI app is served by uvicorn workers, so
+# the async list/retrieve endpoints (`*/async/`) hold slow clients
+# without pinning a thread; sync views then run in a thread pool.
+if os.getenv("GUNICORN_ASGI") == "True":
+    wsgi_app = "library_service_api.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "library_service_api.wsgi:application"
+    worker_class = "gthread"
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8080")
+
+workers = int(
+    os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1)
+)
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+backlog = int(os.getenv("GUNICORN_BACKLOG", 2048))
+
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+# Recycle workers now and then to bound memory growth; the jitter keeps
+# them from restarting all at once.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+reload = os.getenv("GUNICORN_RELOAD") == "True"
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
@@ -0,0 +1,138 @@
+"""
+PostgreSQL backend that keeps connections in an in-process pool.
+
+Connections are taken from a `psycopg2.pool.ThreadedConnectionPool` when
+Django connects and put back when Django closes them (at the end of each
+request with CONN_MAX_AGE = 0), so requests skip the connection setup.
+Configure it with the `POOL` key of the database settings:
+
+    "POOL": {"MIN_SIZE": 1, "MAX_SIZE": 20, "TIMEOUT": 5}
+
+When every connection is checked out, connecting waits up to `TIMEOUT`
+seconds for one to be put back and then raises `PoolError`.
+"""
+import threading
+
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool(ThreadedConnectionPool):
+    """A pool that opens its connections with a custom factory."""
+
+    def __init__(self, min_size: int, max_size: int, timeout: float, connect):
+        self._connect_with = connect
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.timeout = timeout
+        super().__init__(min_size, max_size)
+        # psycopg2 closes connections put back beyond `minconn`; keep up
+        # to `max_size` of them idle so that they get reused.
+        self.minconn = max_size
+
+    def _connect(self, key=None):
+        connection = self._connect_with()
+
+        if key is not None:
+            self._used[key] = connection
+            self._rused[id(connection)] = key
+        else:
+            self._pool.append(connection)
+
+        return connection
+
+    def checkout(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError("connection pool exhausted")
+
+        try:
+            return self.getconn()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def checkin(self, connection, close: bool = False) -> None:
+        try:
+            self.putconn(connection, close=close)
+        finally:
+            self._slots.release()
+
+
+def close_pools(alias: str = None) -> None:
+    """Close the idle connections of every pool (or of `alias` only)."""
+    with _pools_lock:
+        for key in list(_pools):
+            if alias is None or key[0] == alias:
+                pool = _pools.pop(key)
+                for connection in pool._pool:
+                    connection.close()
+                pool._pool.clear()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections to the test database would block DROP.
+        close_pools(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params) -> ConnectionPool:
+        key = (self.alias, repr(sorted(conn_params.items())))
+
+        with _pools_lock:
+            if key not in _pools:
+                options = self.settings_dict.get("POOL", {})
+                _pools[key] = ConnectionPool(
+                    options.get("MIN_SIZE", 1),
+                    options.get("MAX_SIZE", 10),
+                    options.get("TIMEOUT", 5),
+                    lambda: super(DatabaseWrapper, self).get_new_connection(
+                        conn_params
+                    ),
+                )
+
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", IsolationLevel.READ_COMMITTED
+            )
+        )
+
+        while True:
+            connection = self.pool.checkout()
+            if self.is_pooled_connection_usable(connection):
+                return connection
+
+            self.pool.checkin(connection, close=True)
+
+    def is_pooled_connection_usable(self, connection) -> bool:
+        if connection.closed:
+            return False
+        if not self.settings_dict["CONN_HEALTH_CHECKS"]:
+            return True
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not connection.autocommit:
+                connection.rollback()
+        except self.Database.Error:
+            return False
+
+        return True
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.checkin(
+                    self.connection, close=bool(self.connection.closed)
+                )
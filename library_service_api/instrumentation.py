@@ -0,0 +1,371 @@
+"""
+Opt-in request instrumentation (`INSTRUMENTATION=True`).
+
+`InstrumentationMiddleware` records, per view and HTTP method, the
+request latency, the number of SQL queries, the time spent in the
+database, in serializers and rendering the response into histograms
+kept in the process. `MetricsView` exposes them in the Prometheus text
+format.
+With `INSTRUMENTATION_SLOW_REQUESTS=N` the slowest N requests seen so far
+are logged with their SQL as they come in.
+"""
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.serializers import BaseSerializer
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Cumulative Prometheus histogram with one series per label set"""
+
+    def __init__(self, name: str, documentation: str, buckets: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self.series.get(labels)
+
+        if series is None:
+            series = self.series[labels] = {
+                "counts": [0] * (len(self.buckets) + 1),
+                "sum": 0.0,
+            }
+
+        series["counts"][bisect_left(self.buckets, value)] += 1
+        series["sum"] += value
+
+    def expose(self, label_names: tuple) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+
+        for labels, series in sorted(self.series.items()):
+            label_text = ",".join(
+                f'{name}="{escape_label_value(value)}"'
+                for name, value in zip(label_names, labels)
+            )
+            cumulative = 0
+
+            for bound, count in zip(
+                (*self.buckets, "+Inf"), series["counts"]
+            ):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{label_text},le="{bound}"}} '
+                    f"{cumulative}"
+                )
+
+            lines.append(f"{self.name}_sum{{{label_text}}} {series['sum']}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+
+        return lines
+
+
+def escape_label_value(value: str) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+class MetricsRegistry:
+    """The request histograms of this process, safe to share by threads"""
+
+    label_names = ("view", "method")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.request_duration = Histogram(
+            "library_request_duration_seconds",
+            "Request latency, middleware included.",
+            DURATION_BUCKETS,
+        )
+        self.db_queries = Histogram(
+            "library_db_queries",
+            "SQL queries run by a request.",
+            QUERY_COUNT_BUCKETS,
+        )
+        self.db_duration = Histogram(
+            "library_db_duration_seconds",
+            "Time a request spent executing SQL queries.",
+            DURATION_BUCKETS,
+        )
+        self.serialization_duration = Histogram(
+            "library_serialization_duration_seconds",
+            "Time spent evaluating serializer data.",
+            DURATION_BUCKETS,
+        )
+        self.render_duration = Histogram(
+            "library_render_duration_seconds",
+            "Time spent rendering the response body.",
+            DURATION_BUCKETS,
+        )
+
+    def observe(self, labels: tuple, metrics: "RequestMetrics") -> None:
+        with self.lock:
+            self.request_duration.observe(labels, metrics.duration)
+            self.db_queries.observe(labels, metrics.queries)
+            self.db_duration.observe(labels, metrics.db_duration)
+            self.serialization_duration.observe(
+                labels, metrics.serialization_duration
+            )
+            self.render_duration.observe(labels, metrics.render_duration)
+
+    def expose(self) -> str:
+        with self.lock:
+            lines = [
+                line
+                for histogram in (
+                    self.request_duration,
+                    self.db_queries,
+                    self.db_duration,
+                    self.serialization_duration,
+                    self.render_duration,
+                )
+                for line in histogram.expose(self.label_names)
+            ]
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetrics:
+    """Measurements of a single request, fed by the hooks below"""
+
+    def __init__(self, record_sql: bool = False):
+        self.record_sql = record_sql
+        self.statements = []
+        self.queries = 0
+        self.db_duration = 0.0
+        self.serialization_duration = 0.0
+        self.render_duration = 0.0
+        self.duration = 0.0
+        self.serializing = False
+        self.started = time.perf_counter()
+
+
+# The request being measured. asgiref copies the context into the
+# threads of `sync_to_async`, so the hooks see it wherever the request's
+# queries and serializers run.
+current_metrics = ContextVar("current_metrics", default=None)
+
+serializer_data = BaseSerializer.data
+
+
+def record_query(execute, sql, params, many, context):
+    """`execute_wrapper()` of every connection, timing the current request"""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.queries += 1
+        metrics.db_duration += elapsed
+        if metrics.record_sql:
+            metrics.statements.append((elapsed, sql))
+
+
+def timed_serializer_data(serializer):
+    """`BaseSerializer.data` timed for the current request"""
+    metrics = current_metrics.get()
+    # Serializers evaluated inside another one are already timed.
+    if metrics is None or metrics.serializing:
+        return serializer_data.fget(serializer)
+
+    metrics.serializing = True
+    started = time.perf_counter()
+    try:
+        return serializer_data.fget(serializer)
+    finally:
+        metrics.serialization_duration += time.perf_counter() - started
+        metrics.serializing = False
+
+
+def instrument_connection(sender=None, connection=None, **kwargs) -> None:
+    # First, so that `execute_wrapper()` blocks still pop their own.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def instrument_open_connections(**kwargs) -> None:
+    """Instrument the connections this thread opened before the hooks"""
+    for connection in connections.all(initialized_only=True):
+        instrument_connection(connection=connection)
+
+
+def install_hooks() -> None:
+    """Time the SQL and serializers of every request, once per process"""
+    connection_created.connect(
+        instrument_connection, dispatch_uid="instrumentation"
+    )
+    # Sent in the thread that runs the request's sync code.
+    request_started.connect(
+        instrument_open_connections, dispatch_uid="instrumentation"
+    )
+    instrument_open_connections()
+
+    BaseSerializer.data = property(timed_serializer_data)
+
+
+class SlowRequestLog:
+    """Keep the `size` slowest requests and log each one that gets in"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.lock = threading.Lock()
+        self.slowest = []
+
+    def offer(self, request, metrics: RequestMetrics) -> None:
+        entry = (metrics.duration, request.method, request.path)
+
+        with self.lock:
+            if len(self.slowest) < self.size:
+                heapq.heappush(self.slowest, entry)
+            elif entry > self.slowest[0]:
+                heapq.heapreplace(self.slowest, entry)
+            else:
+                return
+
+        logger.warning(
+            "Slow request %s %s: %.1f ms, %d queries in %.1f ms\n%s",
+            request.method,
+            request.get_full_path(),
+            metrics.duration * 1000,
+            metrics.queries,
+            metrics.db_duration * 1000,
+            "\n".join(
+                f"  {elapsed * 1000:.1f} ms: {sql}"
+                for elapsed, sql in metrics.statements
+            ),
+        )
+
+
+class InstrumentationMiddleware:
+    """
+    Measure every request into `registry`.
+
+    SQL is timed by an `execute_wrapper()` added to every connection and
+    serializers by wrapping `BaseSerializer.data`; both report to the
+    request in `current_metrics`, so they work with `DEBUG` off and under
+    ASGI. Rendering is the time from the view returning a DRF or
+    template response to the end of its rendering; the bodies of
+    streaming responses are produced after the request is recorded. Put
+    it first in `MIDDLEWARE` so the latency covers the other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        slow_requests = getattr(settings, "INSTRUMENTATION_SLOW_REQUESTS", 0)
+        self.slow_log = (
+            SlowRequestLog(slow_requests) if slow_requests else None
+        )
+        install_hooks()
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django would run a sync hook in a thread for every request.
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        self.finish(request, metrics)
+
+        return response
+
+    async def __acall__(self, request):
+        metrics, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        self.finish(request, metrics)
+
+        return response
+
+    def start(self, request):
+        metrics = RequestMetrics(record_sql=self.slow_log is not None)
+        request._instrumentation = metrics
+
+        return metrics, current_metrics.set(metrics)
+
+    def finish(self, request, metrics: RequestMetrics) -> None:
+        metrics.duration = time.perf_counter() - metrics.started
+        match = request.resolver_match
+        registry.observe(
+            (match.view_name if match else "<unresolved>", request.method),
+            metrics,
+        )
+        if self.slow_log is not None:
+            self.slow_log.offer(request, metrics)
+
+    def process_template_response(self, request, response):
+        metrics = request._instrumentation
+        started = time.perf_counter()
+
+        def rendered(response):
+            metrics.render_duration = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        return InstrumentationMiddleware.process_template_response(
+            self, request, response
+        )
+
+
+class MetricsView(APIView):
+    """Request histograms of this process in the Prometheus text format"""
+
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(responses={200: OpenApiTypes.STR})
+    def get(self, request):
+        return HttpResponse(
+            registry.expose(), content_type=PROMETHEUS_CONTENT_TYPE
+        )
@@ -0,0 +1,238 @@
+import json
+from functools import reduce
+from operator import or_
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    CursorPagination,
+    LimitOffsetPagination,
+)
+
+
+class OffsetFallbackPagination(LimitOffsetPagination):
+    default_limit = 50
+    max_limit = 500
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over a unique, indexed ordering.
+
+    The cursor position holds the values of every ordering field, so
+    the next page is fetched with a row comparison against the last
+    seen row instead of an OFFSET, and page N costs the same as page 1.
+    The client may pick one of `ordering_choices` with `?ordering=`.
+
+    Requests with `?offset=` are served by `OffsetFallbackPagination`
+    (count + limit/offset) for admin UIs that need random page access.
+    """
+
+    page_size = 50
+    page_size_query_param = "limit"
+    max_page_size = 500
+    ordering_query_param = "ordering"
+    default_ordering = "id"
+    ordering_choices = {
+        "id": ("id",),
+        "-id": ("-id",),
+    }
+    fallback_class = OffsetFallbackPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+
+        if self.fallback is not None:
+            return self.paginate_fallback(queryset, request, view)
+
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """`paginate_queryset` fetching the page with the async ORM"""
+        queryset = self.get_page_queryset(queryset, request, view)
+
+        if self.fallback is not None:
+            return await sync_to_async(self.paginate_fallback)(
+                queryset, request, view
+            )
+
+        return self.set_page([instance async for instance in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Return the queryset of the requested page (plus one row).
+
+        Sets `self.fallback` when the request is paginated with
+        limit/offset, and then returns the ordered queryset instead.
+        """
+        self.fallback = None
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        if self.fallback_class.offset_query_param in request.query_params:
+            self.fallback = self.fallback_class()
+            return queryset.order_by(*self.ordering)
+
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*self._reversed(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            try:
+                queryset = queryset.filter(
+                    self._after_position(current_position, reverse)
+                )
+            except (ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        return queryset[offset:offset + self.page_size + 1]
+
+    def paginate_fallback(self, queryset, request, view=None):
+        page = self.fallback.paginate_queryset(queryset, request, view)
+        self.display_page_controls = self.fallback.display_page_controls
+
+        return page
+
+    def set_page(self, results: list) -> list:
+        """Keep the page out of the fetched rows and set the positions"""
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = request.query_params.get(
+            self.ordering_query_param, self.default_ordering
+        )
+        if ordering not in self.ordering_choices:
+            ordering = self.default_ordering
+
+        return self.ordering_choices[ordering]
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.fallback is not None:
+            return self.fallback.get_html_context()
+
+        return super().get_html_context()
+
+    def get_schema_operation_parameters(self, view):
+        fallback = self.fallback_class()
+
+        return [
+            *super().get_schema_operation_parameters(view),
+            {
+                "name": fallback.offset_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Switch to limit/offset pagination "
+                               "starting from this index.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.ordering_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Order of the results.",
+                "schema": {
+                    "type": "string",
+                    "enum": list(self.ordering_choices),
+                },
+            },
+        ]
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            field_name = field.lstrip("-")
+            if isinstance(instance, dict):
+                values.append(instance[field_name])
+            else:
+                values.append(getattr(instance, field_name))
+
+        return json.dumps([str(value) for value in values])
+
+    def _after_position(self, position, reverse) -> Q:
+        try:
+            values = json.loads(position)
+        except json.JSONDecodeError:
+            raise NotFound(self.invalid_cursor_message)
+
+        if (
+            not isinstance(values, list)
+            or len(values) != len(self.ordering)
+            or not all(
+                value is None or isinstance(value, (str, int))
+                for value in values
+            )
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        conditions = []
+        for index, field in enumerate(self.ordering):
+            field_name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") != reverse else "gt"
+            equal = {
+                previous.lstrip("-"): value
+                for previous, value in zip(self.ordering[:index], values)
+            }
+            conditions.append(
+                Q(**equal, **{f"{field_name}__{lookup}": values[index]})
+            )
+
+        return reduce(or_, conditions)
+
+    @staticmethod
+    def _reversed(ordering) -> tuple:
+        return tuple(
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in ordering
+        )
@@ -0,0 +1,38 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    `JSONRenderer` encoding with orjson.
+
+    Output is compact, UTF-8 JSON like the default, though not always
+    byte for byte (floats, for one, may be formatted differently). Types
+    orjson does not know (decimals, lazy strings, ...) and datetimes,
+    which it would format differently, are handed to DRF's encoder.
+    Non-string keys are converted as `json` does, since list validation
+    errors are keyed by index. Indented responses (the browsable API asks
+    for them) are still rendered by `JSONRenderer`.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        ret = orjson.dumps(
+            data, default=JSONEncoder().default, option=self.options
+        )
+
+        # Escaped by `JSONRenderer` too, as they end lines in JavaScript.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
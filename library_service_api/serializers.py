@@ -0,0 +1,92 @@
+from datetime import date
+from functools import lru_cache
+from typing import Type
+
+from django.db import models
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Fields whose representation of a database value is the value itself,
+# so rows can skip the `to_representation` call for them.
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+
+
+@lru_cache
+def values_fields(serializer_class: Type[serializers.Serializer]) -> tuple:
+    """The model fields to pass to `values()` for a flat serializer"""
+    return tuple(
+        field.source
+        for field in serializer_class().fields.values()
+        if not field.write_only
+    )
+
+
+class ValuesListSerializer(serializers.ListSerializer):
+    """
+    List serializer with a fast path for `values()` rows.
+
+    Model instances still go through the child serializer field by field.
+    Dict rows, as returned by `QuerySet.values(*values_fields(...))`, are
+    converted with one precomputed function per field instead, which skips
+    the attribute lookups and per-field machinery of `ModelSerializer`.
+    Set it as `Meta.list_serializer_class` of a flat, read-only serializer.
+    """
+
+    def to_representation(self, data):
+        iterable = (
+            data.all() if isinstance(data, models.manager.BaseManager)
+            else data
+        )
+        converters = None
+        result = []
+
+        for row in iterable:
+            if not isinstance(row, dict):
+                result.append(self.child.to_representation(row))
+                continue
+
+            if converters is None:
+                converters = self.get_converters()
+
+            item = {}
+            for name, source, convert in converters:
+                value = row[source]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+
+            result.append(item)
+
+        return result
+
+    def get_converters(self) -> list[tuple]:
+        converters = []
+
+        for name, field in self.child.fields.items():
+            if field.write_only:
+                continue
+
+            if isinstance(field, IDENTITY_FIELDS):
+                convert = None
+            elif isinstance(field, serializers.DateField):
+                output_format = getattr(
+                    field, "format", api_settings.DATE_FORMAT
+                )
+                if output_format is None:
+                    convert = None
+                elif output_format.lower() == ISO_8601:
+                    convert = date.isoformat
+                else:
+                    convert = field.to_representation
+            else:
+                convert = field.to_representation
+
+            converters.append((name, field.source, convert))
+
+        return converters
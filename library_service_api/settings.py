@@ -27,9 +27,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv("SECRET_KEY")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = os.getenv("DEBUG")
+DEBUG = os.getenv("DEBUG") == "True"
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [
+    host for host in os.getenv("ALLOWED_HOSTS", "").split(",") if host
+]
 
 
 # Application definition
@@ -41,14 +43,17 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "drf_spectacular",
     "books",
     "users",
     "borrowings",
+    "payments",
 ]
 
 MIDDLEWARE = [
+    "library_service_api.throttling.PoolExhaustedMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -58,6 +63,38 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Requests handled at once per process, the pool size by default. More
+# wait up to CONCURRENCY_LIMIT_TIMEOUT seconds and then get a 503 asking
+# to retry after CONCURRENCY_LIMIT_RETRY_AFTER seconds, as do requests
+# that find the pool exhausted (see `throttling.py`). 0 disables the
+# limit.
+CONCURRENCY_LIMIT = int(
+    os.getenv("CONCURRENCY_LIMIT")
+    or os.getenv("POSTGRES_POOL_MAX_SIZE")
+    or 0
+)
+CONCURRENCY_LIMIT_TIMEOUT = float(os.getenv("CONCURRENCY_LIMIT_TIMEOUT", 1))
+CONCURRENCY_LIMIT_RETRY_AFTER = int(
+    os.getenv("CONCURRENCY_LIMIT_RETRY_AFTER", 1)
+)
+
+if CONCURRENCY_LIMIT:
+    MIDDLEWARE.insert(
+        0, "library_service_api.throttling.ConcurrencyLimitMiddleware"
+    )
+
+# Per-view query count, database, serialization and total latency
+# histograms, served at /api/metrics/ (see `instrumentation.py`).
+INSTRUMENTATION = os.getenv("INSTRUMENTATION") == "True"
+INSTRUMENTATION_SLOW_REQUESTS = int(
+    os.getenv("INSTRUMENTATION_SLOW_REQUESTS", 0)
+)
+
+if INSTRUMENTATION:
+    MIDDLEWARE.insert(
+        0, "library_service_api.instrumentation.InstrumentationMiddleware"
+    )
+
 ROOT_URLCONF = "library_service_api.urls"
 
 TEMPLATES = [
@@ -89,9 +126,56 @@ DATABASES = {
         "NAME": os.getenv("POSTGRES_DB"),
         "USER": os.getenv("POSTGRES_USER"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
+        "CONN_MAX_AGE": int(os.getenv("POSTGRES_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": os.getenv(
+            "POSTGRES_CONN_HEALTH_CHECKS", "True"
+        ) == "True",
+    }
+}
+
+# SQLite (`SQLITE_PATH=db.sqlite3`) is meant for local development and
+# benchmarks only; search falls back to `icontains` lookups there.
+if os.getenv("SQLITE_PATH"):
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.getenv("SQLITE_PATH"),
+    }
+
+# With a pool, connections go back to it at the end of every request
+# instead of staying open in the thread that used them.
+elif int(os.getenv("POSTGRES_POOL_MAX_SIZE", 0)):
+    DATABASES["default"].update(
+        {
+            "ENGINE": "library_service_api.backends.postgresql_pool",
+            "CONN_MAX_AGE": 0,
+            "POOL": {
+                "MIN_SIZE": int(os.getenv("POSTGRES_POOL_MIN_SIZE", 1)),
+                "MAX_SIZE": int(os.getenv("POSTGRES_POOL_MAX_SIZE")),
+                "TIMEOUT": float(os.getenv("POSTGRES_POOL_TIMEOUT", 5)),
+            },
+        }
+    )
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
 }
 
+if os.getenv("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL"),
+    }
+
+# Local-memory caches are per process and only see catalogue version
+# bumps made by the same process, so keep responses short-lived there.
+BOOK_CACHE_TIMEOUT = int(os.getenv("BOOK_CACHE_TIMEOUT", 60))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -115,6 +199,25 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hasher of new and rehashed passwords: "argon2", "scrypt" or "pbkdf2".
+# Every hasher stays listed, so existing hashes still verify and are
+# rehashed with the preferred one on the next successful login.
+PASSWORD_HASHER_PROFILES = {
+    "argon2": "users.hashers.TunedArgon2PasswordHasher",
+    "scrypt": "django.contrib.auth.hashers.ScryptPasswordHasher",
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+}
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "argon2")
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_PROFILES[PASSWORD_HASHER],
+    *(
+        hasher
+        for profile, hasher in PASSWORD_HASHER_PROFILES.items()
+        if profile != PASSWORD_HASHER
+    ),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
 AUTH_USER_MODEL = "users.User"
 
 # Internationalization
@@ -139,11 +242,41 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Authenticate with users built from the token claims, without loading
+# the user row on every request. Account state used to reject revoked
+# tokens is cached for AUTH_USER_STATE_CACHE_TIMEOUT seconds.
+JWT_STATELESS_AUTH = os.getenv("JWT_STATELESS_AUTH") == "True"
+AUTH_USER_STATE_CACHE_TIMEOUT = int(
+    os.getenv("AUTH_USER_STATE_CACHE_TIMEOUT", 30)
+)
+
+# Every day a book is returned late is fined FINE_MULTIPLIER times its
+# daily fee.
+FINE_MULTIPLIER = os.getenv("FINE_MULTIPLIER", "2")
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.StatelessJWTAuthentication"
+        if JWT_STATELESS_AUTH
+        else "rest_framework_simplejwt.authentication.JWTAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "library_service_api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "library_service_api.pagination."
+                                "KeysetPagination",
+    # Only views with a `throttle_scope` are throttled, per user or per
+    # client address for anonymous requests.
+    "DEFAULT_THROTTLE_CLASSES": [
+        "library_service_api.throttling.TokenBucketThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {
+        "token": os.getenv("THROTTLE_TOKEN_RATE", "20/min"),
+        "register": os.getenv("THROTTLE_REGISTER_RATE", "10/min"),
+        "borrow": os.getenv("THROTTLE_BORROW_RATE", "60/min"),
+    },
 }
 
 SIMPLE_JWT = {
@@ -152,6 +285,8 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": False,
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_NAME": "HTTP_AUTHORIZE",
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers."
+                               "UserTokenObtainPairSerializer",
 }
 
 SPECTACULAR_SETTINGS = {
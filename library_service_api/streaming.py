@@ -0,0 +1,106 @@
+import csv
+import io
+from itertools import islice
+from typing import Iterable, Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+STREAM_CHUNK_SIZE = 2000
+
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+
+def json_array_chunks(rows: Iterable[dict]) -> Iterator[str]:
+    """Encode `rows` as a JSON array, one row at a time"""
+    encoder = DjangoJSONEncoder()
+    separator = "["
+
+    for row in rows:
+        yield separator + encoder.encode(row)
+        separator = ",\n"
+
+    yield "[]" if separator == "[" else "]"
+
+
+def csv_chunks(
+    rows: Iterable[dict], fields: list[str], chunk_size: int
+) -> Iterator[str]:
+    """Encode `rows` as CSV with a header, `chunk_size` rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    rows = iter(rows)
+
+    while True:
+        writer.writerows(islice(rows, chunk_size))
+        chunk = buffer.getvalue()
+        if not chunk:
+            return
+
+        yield chunk
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def jsonl_chunks(rows: Iterable[dict], chunk_size: int) -> Iterator[str]:
+    """Encode `rows` as JSON lines, `chunk_size` rows at a time"""
+    encoder = DjangoJSONEncoder()
+    rows = iter(rows)
+
+    while chunk := [
+        encoder.encode(row) + "\n" for row in islice(rows, chunk_size)
+    ]:
+        yield "".join(chunk)
+
+
+def export_chunks(
+    queryset, export_format: str, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Encode the rows of a `values()` queryset as CSV or JSON lines.
+
+    Rows are fetched with a server-side cursor `chunk_size` at a time and
+    encoded as they arrive, so memory use does not grow with the table.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+
+    if export_format == "csv":
+        fields = [
+            *queryset.query.values_select,
+            *queryset.query.annotation_select,
+        ]
+        return csv_chunks(rows, fields, chunk_size)
+
+    return jsonl_chunks(rows, chunk_size)
+
+
+def stream_json_array(queryset) -> StreamingHttpResponse:
+    """
+    Stream the rows of a `values()` queryset as a JSON array.
+
+    Rows are fetched with a server-side cursor in chunks, so memory use
+    does not grow with the size of the result.
+    """
+    return StreamingHttpResponse(
+        json_array_chunks(queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)),
+        content_type="application/json",
+    )
+
+
+def stream_export(
+    queryset, export_format: str, filename: str
+) -> StreamingHttpResponse:
+    """Stream a `values()` queryset as a CSV or JSONL file download"""
+    response = StreamingHttpResponse(
+        export_chunks(queryset, export_format),
+        content_type=EXPORT_CONTENT_TYPES[export_format],
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{export_format}"'
+    )
+
+    return response
@@ -0,0 +1,146 @@
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from books.tests.test_book_api import ASYNC_BOOK_URL, BOOK_URL, sample_book
+from library_service_api import instrumentation
+from library_service_api.instrumentation import Histogram, MetricsRegistry
+
+METRICS_URL = reverse("metrics")
+
+
+class HistogramTests(SimpleTestCase):
+    def test_expose_cumulative_buckets(self):
+        histogram = Histogram("test_seconds", "Test.", (0.1, 1.0))
+
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(("books", "GET"), value)
+
+        self.assertEqual(
+            histogram.expose(("view", "method")),
+            [
+                "# HELP test_seconds Test.",
+                "# TYPE test_seconds histogram",
+                'test_seconds_bucket{view="books",method="GET",le="0.1"} 2',
+                'test_seconds_bucket{view="books",method="GET",le="1.0"} 3',
+                'test_seconds_bucket{view="books",method="GET",le="+Inf"} 4',
+                'test_seconds_sum{view="books",method="GET"} 3.65',
+                'test_seconds_count{view="books",method="GET"} 4',
+            ],
+        )
+
+    def test_label_values_are_escaped(self):
+        histogram = Histogram("test", "Test.", (1,))
+        histogram.observe(('a"b\\', "GET"), 1)
+
+        self.assertIn(
+            'test_count{view="a\\"b\\\\",method="GET"} 1',
+            histogram.expose(("view", "method")),
+        )
+
+
+@override_settings(
+    MIDDLEWARE=[
+        "library_service_api.instrumentation.InstrumentationMiddleware",
+        *settings.MIDDLEWARE,
+    ]
+)
+class InstrumentationMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "passwordtest", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        patcher = mock.patch.object(
+            instrumentation, "registry", MetricsRegistry()
+        )
+        self.registry = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_request_is_measured_per_view(self):
+        sample_book()
+        self.client.get(BOOK_URL)
+
+        labels = ("book:book-list", "GET")
+        series = self.registry.db_queries.series[labels]
+        self.assertEqual(sum(series["counts"]), 1)
+        self.assertGreater(series["sum"], 0)
+        self.assertGreater(
+            self.registry.request_duration.series[labels]["sum"],
+            self.registry.db_duration.series[labels]["sum"],
+        )
+        self.assertGreater(
+            self.registry.serialization_duration.series[labels]["sum"], 0
+        )
+        self.assertGreater(
+            self.registry.render_duration.series[labels]["sum"], 0
+        )
+
+    async def test_async_request_is_measured(self):
+        # The test client doesn't send `request_started` in the thread
+        # that runs the queries, whose connection is already open.
+        await sync_to_async(instrumentation.instrument_open_connections)()
+        await sync_to_async(sample_book)()
+        token = await sync_to_async(AccessToken.for_user)(self.user)
+        await self.async_client.get(
+            ASYNC_BOOK_URL, headers={"Authorize": f"Bearer {token}"}
+        )
+
+        labels = ("book:book-async-list", "GET")
+        self.assertGreater(self.registry.db_queries.series[labels]["sum"], 0)
+        self.assertGreater(
+            self.registry.serialization_duration.series[labels]["sum"], 0
+        )
+
+    def test_middleware_is_async_capable(self):
+        async def get_response(request):
+            return None
+
+        self.assertTrue(
+            iscoroutinefunction(
+                instrumentation.InstrumentationMiddleware(get_response)
+            )
+        )
+
+    def test_metrics_in_prometheus_format(self):
+        self.client.get(BOOK_URL)
+
+        result = self.client.get(METRICS_URL)
+
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertTrue(result["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            'library_request_duration_seconds_count{view="book:book-list",'
+            'method="GET"} 1',
+            result.content.decode(),
+        )
+
+    def test_metrics_staff_only(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                "user@test.com", "passwordtest"
+            )
+        )
+
+        result = self.client.get(METRICS_URL)
+
+        self.assertEqual(result.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(INSTRUMENTATION_SLOW_REQUESTS=1)
+    def test_slowest_requests_logged_with_sql(self):
+        with self.assertLogs(instrumentation.logger, "WARNING") as logs:
+            self.client.get(BOOK_URL)
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn(f"GET {BOOK_URL}", logs.output[0])
+        self.assertIn("books_book", logs.output[0])
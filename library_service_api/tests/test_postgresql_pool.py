@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.pool import PoolError
+
+from library_service_api.backends.postgresql_pool.base import (
+    ConnectionPool,
+    _pools,
+    close_pools,
+)
+
+
+def sample_connection():
+    connection = mock.Mock(closed=0)
+    connection.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    return connection
+
+
+def sample_pool(**params):
+    defaults = {
+        "min_size": 0,
+        "max_size": 2,
+        "timeout": 0.01,
+        "connect": sample_connection,
+    }
+    defaults.update(params)
+
+    return ConnectionPool(**defaults)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def test_checked_in_connection_is_reused(self):
+        pool = sample_pool()
+
+        connection = pool.checkout()
+        pool.checkin(connection)
+
+        self.assertIs(pool.checkout(), connection)
+
+    def test_checkout_raises_when_pool_is_exhausted(self):
+        pool = sample_pool()
+        pool.checkout()
+        pool.checkout()
+
+        with self.assertRaises(PoolError):
+            pool.checkout()
+
+    def test_checkin_frees_a_slot(self):
+        pool = sample_pool(max_size=1)
+
+        pool.checkin(pool.checkout())
+
+        self.assertIsNotNone(pool.checkout())
+
+    def test_close_pools_closes_idle_connections_of_alias(self):
+        pool = sample_pool()
+        connection = pool.checkout()
+        pool.checkin(connection)
+        _pools[("other", "")] = pool
+
+        close_pools("other")
+
+        connection.close.assert_called_once()
+        self.assertNotIn(("other", ""), _pools)
@@ -0,0 +1,94 @@
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from rest_framework.renderers import JSONRenderer
+
+from books.models import Book
+from books.serializers import BookSerializer
+from books.tests.test_book_api import sample_book
+from borrowings.models import Borrowing
+from borrowings.serializers import BorrowingSerializer
+from library_service_api.renderers import ORJSONRenderer
+from library_service_api.serializers import values_fields
+
+
+class ValuesListSerializerTests(TestCase):
+    def assert_values_match_instances(self, serializer_class, queryset):
+        self.assertEqual(
+            serializer_class(
+                queryset.values(*values_fields(serializer_class)), many=True
+            ).data,
+            serializer_class(queryset, many=True).data,
+        )
+
+    def test_book_rows_match_model_serializer(self):
+        sample_book(daily_fee=Decimal("1.5"), cover=Book.Cover.HARD)
+        sample_book(title="Dune", author="Frank Herbert")
+
+        self.assert_values_match_instances(
+            BookSerializer, Book.objects.order_by("id")
+        )
+
+    def test_borrowing_rows_match_model_serializer(self):
+        user = get_user_model().objects.create_user(
+            "user@test.com", "passwordtest"
+        )
+        today = date.today()
+        for _ in range(2):
+            Borrowing.objects.create(
+                expected_return_date=today + timedelta(days=3),
+                book=sample_book(),
+                user=user,
+            )
+        Borrowing.objects.filter(
+            pk=Borrowing.objects.order_by("id").first().pk
+        ).update(actual_return_date=today + timedelta(days=1))
+
+        self.assert_values_match_instances(
+            BorrowingSerializer, Borrowing.objects.order_by("id")
+        )
+
+    def test_values_fields(self):
+        self.assertEqual(
+            values_fields(BorrowingSerializer),
+            (
+                "id",
+                "borrow_date",
+                "expected_return_date",
+                "actual_return_date",
+                "book_id",
+                "user_id",
+            ),
+        )
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def test_output_matches_json_renderer(self):
+        data = {
+            "title": "Tolkien \u2028 \u00d8rnulf",
+            "daily_fee": Decimal("1.50"),
+            "created": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+            "results": [1, None, True, 2.5],
+        }
+
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_int_keys_match_json_renderer(self):
+        data = {"books": {0: ["A valid integer is required."]}}
+
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_indented_output_matches_json_renderer(self):
+        data = {"results": [{"id": 1}]}
+        context = {"indent": 4}
+
+        self.assertEqual(
+            ORJSONRenderer().render(data, renderer_context=context),
+            JSONRenderer().render(data, renderer_context=context),
+        )
@@ -0,0 +1,171 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import Error
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+from psycopg2.pool import PoolError
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.tests.test_book_api import sample_book
+from library_service_api.throttling import (
+    ConcurrencyLimitMiddleware,
+    PoolExhaustedMiddleware,
+    TokenBucketThrottle,
+)
+
+TOKEN_URL = reverse("user:token_obtain_pair")
+BORROWING_URL = reverse("borrowing:borrowing-list")
+RATES = {"token": "2/min", "register": "2/min", "borrow": "2/min"}
+
+
+@mock.patch.object(TokenBucketThrottle, "THROTTLE_RATES", RATES)
+class TokenBucketThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@test.com", "passwordtest"
+        )
+
+    def obtain_token(self):
+        return self.client.post(
+            TOKEN_URL, {"email": "user@test.com", "password": "passwordtest"}
+        )
+
+    def borrow(self):
+        return self.client.post(
+            BORROWING_URL,
+            {
+                "book": sample_book().id,
+                "expected_return_date": date.today() + timedelta(days=7),
+            },
+        )
+
+    def test_token_requests_over_the_burst_are_rejected(self):
+        for _ in range(2):
+            self.assertEqual(self.obtain_token().status_code, 200)
+
+        response = self.obtain_token()
+
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertEqual(response["Retry-After"], "30")
+
+    def test_bucket_refills_over_time(self):
+        with mock.patch.object(TokenBucketThrottle, "timer") as timer:
+            timer.return_value = 1000
+            for _ in range(2):
+                self.obtain_token()
+
+            timer.return_value = 1030
+            self.assertEqual(self.obtain_token().status_code, 200)
+            self.assertEqual(
+                self.obtain_token().status_code,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+
+    def test_borrowing_is_throttled_per_user(self):
+        self.client.force_authenticate(self.user)
+        for _ in range(2):
+            self.assertEqual(self.borrow().status_code, 201)
+
+        self.assertEqual(
+            self.borrow().status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertEqual(self.client.get(BORROWING_URL).status_code, 200)
+
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("other@test.com", "password")
+        )
+        self.assertEqual(self.borrow().status_code, 201)
+
+    def test_scope_without_a_rate_is_not_throttled(self):
+        with mock.patch.object(
+            TokenBucketThrottle, "THROTTLE_RATES", {"token": None}
+        ):
+            for _ in range(3):
+                self.assertEqual(self.obtain_token().status_code, 200)
+
+
+@override_settings(CONCURRENCY_LIMIT=1, CONCURRENCY_LIMIT_TIMEOUT=0)
+class ConcurrencyLimitMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+
+    def test_requests_over_the_limit_get_503(self):
+        responses = []
+
+        def get_response(request):
+            # A second request arrives while the first holds the slot.
+            responses.append(middleware(request))
+            return HttpResponse()
+
+        middleware = ConcurrencyLimitMiddleware(get_response)
+
+        self.assertEqual(middleware(self.request).status_code, 200)
+        self.assertEqual(
+            responses[0].status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertEqual(responses[0]["Retry-After"], "1")
+
+    def test_slot_is_released_after_an_exception(self):
+        def get_response(request):
+            raise ValueError
+
+        middleware = ConcurrencyLimitMiddleware(get_response)
+        with self.assertRaises(ValueError):
+            middleware(self.request)
+
+        middleware.get_response = lambda request: HttpResponse()
+        self.assertEqual(middleware(self.request).status_code, 200)
+
+    async def test_async_requests_over_the_limit_get_503(self):
+        responses = []
+
+        async def get_response(request):
+            responses.append(await middleware(request))
+            return HttpResponse()
+
+        middleware = ConcurrencyLimitMiddleware(get_response)
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertEqual((await middleware(self.request)).status_code, 200)
+        self.assertEqual(
+            responses[0].status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertEqual((await middleware(self.request)).status_code, 200)
+
+    @override_settings(CONCURRENCY_LIMIT=0)
+    def test_not_used_without_a_limit(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ConcurrencyLimitMiddleware(lambda request: HttpResponse())
+
+
+class PoolExhaustedMiddlewareTests(SimpleTestCase):
+    def test_exhausted_pool_gets_503(self):
+        request = RequestFactory().get("/")
+        middleware = PoolExhaustedMiddleware(lambda request: None)
+
+        try:
+            raise Error from PoolError("connection pool exhausted")
+        except Error as exception:
+            response = middleware.process_exception(request, exception)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertIsNone(middleware.process_exception(request, Error()))
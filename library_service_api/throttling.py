@@ -0,0 +1,153 @@
+"""
+Rate limiting and load shedding for the expensive endpoints.
+
+`TokenBucketThrottle` limits the views that set a `throttle_scope`
+(token issuance, registration, borrowing) to the rate of that scope in
+`DEFAULT_THROTTLE_RATES`, per user or per client address for anonymous
+requests. `ConcurrencyLimitMiddleware` caps the requests a process
+handles at once, and it and `PoolExhaustedMiddleware` answer `503` with
+`Retry-After` instead of letting requests queue for a database
+connection until they time out.
+"""
+import asyncio
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+from psycopg2.pool import PoolError
+from rest_framework.throttling import ScopedRateThrottle
+
+
+class TokenBucketThrottle(ScopedRateThrottle):
+    """
+    Token bucket per scope and client, kept in the default cache.
+
+    A bucket holds up to the number of requests of the rate and refills
+    continuously over its period, so `10/min` allows a burst of 10 and
+    then one request every 6 seconds. Its state is one `(tokens,
+    updated)` pair read and written once per request, unlike the
+    request history list of `SimpleRateThrottle`. Concurrent requests of
+    the same client may both take the last token; the limit is a guard
+    against bursts, not an exact quota.
+    """
+
+    cache_format = "throttle:bucket:%(scope)s:%(ident)s"
+
+    def allow_request(self, request, view) -> bool:
+        self.scope = getattr(view, self.scope_attr, None)
+
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        refill_rate = self.num_requests / self.duration
+        tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+        tokens = min(
+            self.num_requests, tokens + (now - updated) * refill_rate
+        )
+
+        if tokens < 1:
+            self.wait_time = (1 - tokens) / refill_rate
+            return False
+
+        self.cache.set(self.key, (tokens - 1, now), self.duration)
+
+        return True
+
+    def wait(self) -> float:
+        return self.wait_time
+
+
+def service_unavailable() -> JsonResponse:
+    response = JsonResponse(
+        {"detail": "The server is overloaded, retry later."}, status=503
+    )
+    response["Retry-After"] = str(settings.CONCURRENCY_LIMIT_RETRY_AFTER)
+
+    return response
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Handle at most `CONCURRENCY_LIMIT` requests at once in this process.
+
+    A request over the limit waits up to `CONCURRENCY_LIMIT_TIMEOUT`
+    seconds for a slot and is then rejected with `503` and
+    `Retry-After`. Set the limit to the connection budget of the process
+    (the pool size) so admitted requests rarely wait for a connection.
+    Under ASGI the slots are an `asyncio.Semaphore`, so waiting requests
+    do not hold a thread. Streaming bodies are produced after the slot is
+    released. Only installed when the limit is set.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.CONCURRENCY_LIMIT:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.timeout = settings.CONCURRENCY_LIMIT_TIMEOUT
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            self.slots = asyncio.Semaphore(settings.CONCURRENCY_LIMIT)
+        else:
+            self.slots = threading.BoundedSemaphore(
+                settings.CONCURRENCY_LIMIT
+            )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not self.slots.acquire(timeout=self.timeout):
+            return service_unavailable()
+
+        try:
+            return self.get_response(request)
+        finally:
+            self.slots.release()
+
+    async def __acall__(self, request):
+        try:
+            if self.slots.locked():
+                await asyncio.wait_for(self.slots.acquire(), self.timeout)
+            else:
+                await self.slots.acquire()
+        except asyncio.TimeoutError:
+            return service_unavailable()
+
+        try:
+            return await self.get_response(request)
+        finally:
+            self.slots.release()
+
+
+class PoolExhaustedMiddleware(MiddlewareMixin):
+    """
+    Answer `503` with `Retry-After` instead of `500` when a view can't
+    get a database connection because the pool stayed exhausted for
+    `POOL["TIMEOUT"]` seconds.
+    """
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, PoolError) or isinstance(
+            exception.__cause__, PoolError
+        ):
+            return service_unavailable()
+
+        return None
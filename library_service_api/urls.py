@@ -22,11 +22,15 @@ from drf_spectacular.views import (
     SpectacularRedocView,
 )
 
+from library_service_api.instrumentation import MetricsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/books/", include("books.urls", namespace="book")),
     path("api/users/", include("users.urls", namespace="user")),
     path("api/borrowings/", include("borrowings.urls", namespace="borrowing")),
+    path("api/payments/", include("payments.urls", namespace="payment")),
+    path("api/metrics/", MetricsView.as_view(), name="metrics"),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "api/doc/swagger/",
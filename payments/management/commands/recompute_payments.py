@@ -0,0 +1,55 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from borrowings.models import Borrowing
+from payments.models import Payment
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the fees and fines of every returned borrowing. "
+        "The borrowing table is walked in primary key ranges, and every "
+        "range is computed with one query and upserted with one INSERT. "
+        "Paid payments are not changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        started = time.perf_counter()
+        written = 0
+
+        bounds = Borrowing.objects.filter(
+            actual_return_date__isnull=False
+        ).aggregate(first=Min("id"), last=Max("id"))
+
+        if bounds["first"] is not None:
+            for start in range(
+                bounds["first"], bounds["last"] + 1, chunk_size
+            ):
+                with transaction.atomic():
+                    written += Payment.objects.calculate(
+                        Borrowing.objects.filter(
+                            id__gte=start, id__lt=start + chunk_size
+                        )
+                    )
+
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"Processed borrowings up to id "
+                    f"{min(start + chunk_size - 1, bounds['last'])}, "
+                    f"{written} payments written "
+                    f"({written / elapsed:.0f} payments/s)"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {written} payments written "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,130 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, models
+from django.db.models import DecimalField, ExpressionWrapper, F, Value
+from django.db.models.functions import Greatest, Least
+from django.utils.translation import gettext_lazy as _
+
+from borrowings.models import Borrowing, DaysBetween
+
+
+class PaymentManager(models.Manager):
+    """Fees and fines computed by the database for sets of borrowings."""
+
+    def calculate(self, borrowings: models.QuerySet) -> int:
+        """
+        Compute the fee and the fine of every returned borrowing in
+        `borrowings` and upsert them as pending payments.
+
+        The fee covers the days up to the return (at least one), capped
+        at the expected return date, times `Book.daily_fee`. Every day
+        after the expected return date is fined `FINE_MULTIPLIER` times
+        the daily fee. Payments that are already paid are left alone.
+
+        Everything runs as one INSERT ... SELECT ... ON CONFLICT, so no
+        amount is computed in Python. Returns the number of payments
+        written, counted from the ids the statement returns.
+        """
+        amounts = (
+            borrowings.filter(actual_return_date__isnull=False)
+            .annotate(
+                fee=self._amount(
+                    Greatest(
+                        DaysBetween(
+                            Least(
+                                F("actual_return_date"),
+                                F("expected_return_date"),
+                            ),
+                            F("borrow_date"),
+                        ),
+                        Value(1),
+                    ),
+                    Decimal(1),
+                ),
+                fine=self._amount(
+                    Greatest(
+                        DaysBetween(
+                            F("actual_return_date"),
+                            F("expected_return_date"),
+                        ),
+                        Value(0),
+                    ),
+                    Decimal(settings.FINE_MULTIPLIER),
+                ),
+            )
+            .values("id", "fee", "fine")
+        )
+        connection = connections[self.db]
+        amounts_sql, amounts_params = amounts.query.get_compiler(
+            connection=connection
+        ).as_sql()
+        table = connection.ops.quote_name(self.model._meta.db_table)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH amounts AS ({amounts_sql})
+                INSERT INTO {table}
+                    (borrowing_id, type, status, money_to_pay)
+                SELECT id, %s, %s, fee FROM amounts WHERE fee > 0
+                UNION ALL
+                SELECT id, %s, %s, fine FROM amounts WHERE fine > 0
+                ON CONFLICT (borrowing_id, type) DO UPDATE
+                SET money_to_pay = excluded.money_to_pay
+                WHERE {table}.status = %s
+                RETURNING id
+                """,
+                [
+                    *amounts_params,
+                    Payment.Type.PAYMENT,
+                    Payment.Status.PENDING,
+                    Payment.Type.FINE,
+                    Payment.Status.PENDING,
+                    Payment.Status.PENDING,
+                ],
+            )
+
+            # `rowcount` is -1 for this statement on SQLite.
+            return len(cursor.fetchall())
+
+    @staticmethod
+    def _amount(days, multiplier: Decimal) -> ExpressionWrapper:
+        return ExpressionWrapper(
+            days * F("book__daily_fee") * Value(multiplier),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        )
+
+
+class Payment(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "PENDING", _("PENDING")
+        PAID = "PAID", _("PAID")
+
+    class Type(models.TextChoices):
+        PAYMENT = "PAYMENT", _("PAYMENT")
+        FINE = "FINE", _("FINE")
+
+    status = models.CharField(
+        max_length=7, choices=Status.choices, default=Status.PENDING
+    )
+    type = models.CharField(max_length=7, choices=Type.choices)
+    borrowing = models.ForeignKey(
+        Borrowing,
+        on_delete=models.CASCADE,
+        related_name="payments",
+    )
+    money_to_pay = models.DecimalField(max_digits=10, decimal_places=2)
+
+    objects = PaymentManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["borrowing", "type"],
+                name="payment_borrowing_type_unique",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.type} for {self.borrowing_id}: {self.money_to_pay}"
@@ -0,0 +1,178 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.tests.test_book_api import sample_book
+from borrowings.models import Borrowing
+from borrowings.tests.test_borrowing_api import (
+    EXPECTED_RETURN_DATE,
+    return_url,
+    sample_borrowing,
+    sample_user,
+)
+from payments.models import Payment
+
+PAYMENT_URL = reverse("payment:payment-list")
+
+
+def returned_borrowing(days_late: int = 0, **params):
+    borrowing = sample_borrowing(**params)
+    Borrowing.objects.filter(pk=borrowing.pk).update(
+        actual_return_date=EXPECTED_RETURN_DATE + timedelta(days=days_late)
+    )
+
+    return borrowing
+
+
+class PaymentCalculationTests(TestCase):
+    def setUp(self):
+        self.user = sample_user()
+        self.book = sample_book(daily_fee=Decimal("1.50"))
+
+    def get_amounts(self, borrowing) -> dict:
+        return dict(
+            Payment.objects.filter(borrowing=borrowing).values_list(
+                "type", "money_to_pay"
+            )
+        )
+
+    def test_on_time_return_is_charged_the_borrowed_days(self):
+        borrowing = returned_borrowing(book=self.book)
+
+        Payment.objects.calculate(Borrowing.objects.all())
+
+        self.assertEqual(
+            self.get_amounts(borrowing),
+            {Payment.Type.PAYMENT: Decimal("15.00")},
+        )
+
+    @override_settings(FINE_MULTIPLIER="2")
+    def test_late_return_is_fined_per_day(self):
+        borrowing = returned_borrowing(days_late=3, book=self.book)
+
+        written = Payment.objects.calculate(Borrowing.objects.all())
+
+        self.assertEqual(written, 2)
+        self.assertEqual(
+            self.get_amounts(borrowing),
+            {
+                Payment.Type.PAYMENT: Decimal("15.00"),
+                Payment.Type.FINE: Decimal("9.00"),
+            },
+        )
+
+    def test_same_day_return_is_charged_one_day(self):
+        borrowing = sample_borrowing(book=self.book)
+        client = APIClient()
+        client.force_authenticate(borrowing.user)
+
+        client.post(return_url(borrowing.id))
+
+        self.assertEqual(
+            self.get_amounts(borrowing),
+            {Payment.Type.PAYMENT: Decimal("1.50")},
+        )
+
+    def test_active_borrowings_are_not_charged(self):
+        sample_borrowing(book=self.book)
+
+        written = Payment.objects.calculate(Borrowing.objects.all())
+
+        self.assertEqual(written, 0)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_recalculation_updates_pending_and_keeps_paid(self):
+        borrowing = returned_borrowing(days_late=1, book=self.book)
+        Payment.objects.calculate(Borrowing.objects.all())
+        Payment.objects.filter(type=Payment.Type.PAYMENT).update(
+            status=Payment.Status.PAID, money_to_pay=Decimal("1.00")
+        )
+        Borrowing.objects.filter(pk=borrowing.pk).update(
+            actual_return_date=EXPECTED_RETURN_DATE + timedelta(days=2)
+        )
+
+        Payment.objects.calculate(Borrowing.objects.all())
+
+        self.assertEqual(
+            self.get_amounts(borrowing),
+            {
+                Payment.Type.PAYMENT: Decimal("1.00"),
+                Payment.Type.FINE: Decimal("6.00"),
+            },
+        )
+
+    def test_calculation_query_count_does_not_depend_on_size(self):
+        for _ in range(5):
+            returned_borrowing(days_late=1, book=self.book)
+
+        with self.assertNumQueries(1):
+            Payment.objects.calculate(Borrowing.objects.all())
+
+
+class RecomputePaymentsCommandTests(TestCase):
+    def test_recompute_in_chunks(self):
+        sample_user()
+        borrowings = [returned_borrowing(days_late=1) for _ in range(5)]
+        sample_borrowing()
+        out = StringIO()
+
+        call_command("recompute_payments", chunk_size=2, stdout=out)
+        call_command("recompute_payments", chunk_size=2, stdout=StringIO())
+
+        self.assertEqual(out.getvalue().count("Processed"), 3)
+        self.assertEqual(Payment.objects.count(), 2 * len(borrowings))
+
+
+class PaymentApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        self.client.force_authenticate(self.user)
+
+    def test_auth_required(self):
+        self.client.force_authenticate(None)
+
+        result = self.client.get(PAYMENT_URL)
+
+        self.assertEqual(result.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_list_own_payments(self):
+        own = returned_borrowing(user=self.user)
+        returned_borrowing(user=sample_user(email="other@test.com"))
+        Payment.objects.calculate(Borrowing.objects.all())
+
+        result = self.client.get(PAYMENT_URL)
+
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [payment["borrowing_id"] for payment in result.data["results"]],
+            [own.id],
+        )
+
+    def test_staff_filters_by_borrowing(self):
+        staff = get_user_model().objects.create_user(
+            "admin@test.com", "passwordtest", is_staff=True
+        )
+        self.client.force_authenticate(staff)
+        borrowing = returned_borrowing(user=self.user)
+        returned_borrowing(user=self.user)
+        Payment.objects.calculate(Borrowing.objects.all())
+
+        result = self.client.get(PAYMENT_URL, {"borrowing_id": borrowing.id})
+
+        self.assertEqual(len(result.data["results"]), 1)
+        self.assertEqual(
+            result.data["results"][0]["borrowing_id"], borrowing.id
+        )
+
+    def test_invalid_borrowing_id(self):
+        result = self.client.get(PAYMENT_URL, {"borrowing_id": "x"})
+
+        self.assertEqual(result.status_code, status.HTTP_400_BAD_REQUEST)
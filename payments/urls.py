@@ -0,0 +1,10 @@
+from rest_framework import routers
+
+from payments.views import PaymentViewSet
+
+router = routers.DefaultRouter()
+router.register("", PaymentViewSet)
+
+urlpatterns = router.urls
+
+app_name = "payment"
@@ -0,0 +1,43 @@
+from django.db.models import QuerySet
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+
+from payments.models import Payment
+from payments.serializers import PaymentSerializer
+
+
+class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Payment.objects.all()
+    serializer_class = PaymentSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def filter_queryset(self, queryset) -> QuerySet:
+        user = self.request.user
+        borrowing_id = self.request.query_params.get("borrowing_id")
+
+        if not user.is_staff:
+            queryset = queryset.filter(borrowing__user_id=user.id)
+        if borrowing_id:
+            if not borrowing_id.isdigit():
+                raise ValidationError(
+                    {"borrowing_id": "A valid integer is required."}
+                )
+
+            queryset = queryset.filter(borrowing_id=borrowing_id)
+
+        return queryset
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "borrowing_id",
+                type=OpenApiTypes.INT,
+                description="Filter by borrowing id (ex. ?borrowing_id=1)",
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
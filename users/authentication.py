@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import (
+    JWTStatelessUserAuthentication,
+)
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+
+def user_state_cache_key(user_id) -> str:
+    return f"users:auth-state:{user_id}"
+
+
+def get_user_state(user_id) -> dict | None:
+    """Return `is_active`/`is_staff` of a user, cached for a short time"""
+    key = user_state_cache_key(user_id)
+    state = cache.get(key)
+
+    if state is None:
+        state = (
+            get_user_model()
+            .objects.filter(pk=user_id)
+            .values("is_active", "is_staff")
+            .first()
+        ) or {}
+        cache.set(key, state, settings.AUTH_USER_STATE_CACHE_TIMEOUT)
+
+    return state
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Authenticate with a `TokenUser` built from the token claims
+    (`user_id`, `email`, `is_staff`) instead of loading the user row.
+
+    Tokens of deleted or deactivated users, and staff tokens of users
+    who are no longer staff, are rejected using the cached user state,
+    so a request does not query the database while the state is cached.
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        state = get_user_state(user.id)
+
+        if not state.get("is_active"):
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        if user.is_staff and not state.get("is_staff"):
+            raise AuthenticationFailed(
+                _("Token is no longer valid"), code="token_not_valid"
+            )
+
+        return user
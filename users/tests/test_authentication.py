@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from users.authentication import StatelessJWTAuthentication
+from users.serializers import UserTokenObtainPairSerializer
+
+
+def sample_user(**params):
+    defaults = {
+        "email": "user@test.com",
+        "password": "passwordtest",
+    }
+    defaults.update(params)
+
+    return get_user_model().objects.create_user(**defaults)
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.authentication = StatelessJWTAuthentication()
+
+    def authenticate(self, user):
+        token = UserTokenObtainPairSerializer.get_token(user).access_token
+        request = self.factory.get("/", HTTP_AUTHORIZE=f"Bearer {token}")
+
+        return self.authentication.authenticate(request)[0]
+
+    def test_user_built_from_token_claims(self):
+        user = sample_user(is_staff=True)
+        self.authenticate(user)
+
+        with self.assertNumQueries(0):
+            token_user = self.authenticate(user)
+
+        self.assertEqual(token_user.id, user.id)
+        self.assertEqual(token_user.email, user.email)
+        self.assertTrue(token_user.is_staff)
+
+    def test_deactivated_user_rejected(self):
+        user = sample_user()
+        self.authenticate(user)
+
+        user.is_active = False
+        user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(user)
+
+    def test_demoted_staff_token_rejected(self):
+        user = sample_user(is_staff=True)
+        token = UserTokenObtainPairSerializer.get_token(user).access_token
+        request = self.factory.get("/", HTTP_AUTHORIZE=f"Bearer {token}")
+
+        user.is_staff = False
+        user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate(request)
+
+
+class AsyncManageUserViewTests(TestCase):
+    def test_retrieve_me(self):
+        user = sample_user()
+        client = APIClient()
+        client.force_authenticate(user)
+
+        result = client.get(reverse("user:manage-async"))
+
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertEqual(result.data["email"], user.email)
+
+    def test_update_not_allowed(self):
+        client = APIClient()
+        client.force_authenticate(sample_user())
+
+        result = client.patch(reverse("user:manage-async"), {"email": "x"})
+
+        self.assertEqual(
+            result.status_code, status.HTTP_405_METHOD_NOT_ALLOWED
+        )
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.hashers import TunedArgon2PasswordHasher
+
+PASSWORD = "passwordtest"
+
+
+class CheaperArgon2PasswordHasher(TunedArgon2PasswordHasher):
+    memory_cost = 8 * 1024
+
+
+class PasswordHasherTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def obtain_token(self):
+        return self.client.post(
+            reverse("user:token_obtain_pair"),
+            {"email": "user@test.com", "password": PASSWORD},
+        )
+
+    def stored_password(self) -> str:
+        return get_user_model().objects.get(email="user@test.com").password
+
+    def test_register_hashes_with_tuned_argon2(self):
+        response = self.client.post(
+            reverse("user:create"),
+            {"email": "user@test.com", "password": PASSWORD},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(self.stored_password().startswith("argon2$argon2id"))
+        self.assertIn("m=19456,t=2,p=1", self.stored_password())
+
+    def test_login_rehashes_legacy_pbkdf2_password(self):
+        get_user_model().objects.create(
+            email="user@test.com",
+            password=make_password(PASSWORD, hasher="pbkdf2_sha256"),
+        )
+
+        response = self.obtain_token()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.stored_password().startswith("argon2$"))
+        self.assertEqual(self.obtain_token().status_code, status.HTTP_200_OK)
+
+    def test_failed_login_keeps_legacy_hash(self):
+        legacy = make_password(PASSWORD, hasher="pbkdf2_sha256")
+        get_user_model().objects.create(email="user@test.com", password=legacy)
+
+        response = self.client.post(
+            reverse("user:token_obtain_pair"),
+            {"email": "user@test.com", "password": "wrong"},
+        )
+
+        self.assertEqual(
+            response.status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        self.assertEqual(self.stored_password(), legacy)
+
+    def test_login_rehashes_when_cost_changes(self):
+        get_user_model().objects.create_user("user@test.com", PASSWORD)
+
+        with override_settings(
+            PASSWORD_HASHERS=[f"{__name__}.CheaperArgon2PasswordHasher"]
+        ):
+            self.assertEqual(
+                self.obtain_token().status_code, status.HTTP_200_OK
+            )
+
+        self.assertIn("m=8192,t=2,p=1", self.stored_password())
+
+    def test_login_rehashes_with_another_profile(self):
+        get_user_model().objects.create_user("user@test.com", PASSWORD)
+
+        with override_settings(
+            PASSWORD_HASHERS=[
+                "django.contrib.auth.hashers.ScryptPasswordHasher",
+                "users.hashers.TunedArgon2PasswordHasher",
+            ]
+        ):
+            self.assertEqual(
+                self.obtain_token().status_code, status.HTTP_200_OK
+            )
+
+        self.assertTrue(self.stored_password().startswith("scrypt$"))
@@ -1,16 +1,23 @@
 from django.urls import path
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
+from rest_framework_simplejwt.views import TokenRefreshView
 
-from users.views import ManageUserView, CreateUserView
+from users.views import (
+    AsyncManageUserView,
+    ManageUserView,
+    CreateUserView,
+    UserTokenObtainPairView,
+)
 
 urlpatterns = [
     path("register/", CreateUserView.as_view(), name="create"),
-    path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path(
+        "token/",
+        UserTokenObtainPairView.as_view(),
+        name="token_obtain_pair",
+    ),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("me/", ManageUserView.as_view(), name="manage"),
+    path("me/async/", AsyncManageUserView.as_view(), name="manage-async"),
 ]
 
 app_name = "user"
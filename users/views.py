@@ -1,13 +1,20 @@
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.views import TokenObtainPairView
 
 # Create your views here.
+from library_service_api.async_views import AsyncAPIViewMixin
 from users.serializers import UserSerializer
 
 
 class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
+    throttle_scope = "register"
+
+
+class UserTokenObtainPairView(TokenObtainPairView):
+    throttle_scope = "token"
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
@@ -17,3 +24,12 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
 
     def get_object(self):
         return self.request.user
+
+
+class AsyncManageUserView(AsyncAPIViewMixin, ManageUserView):
+    """Read-only `ManageUserView` served without a thread under ASGI"""
+
+    http_method_names = ["get", "head", "options"]
+
+    async def get(self, request, *args, **kwargs):
+        return self.retrieve(request, *args, **kwargs)